@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the update_projects.py cache
+Compares the original connect-per-call get/save functions with ProjectCache
+on writes, hits (hot and cold LRU) and misses
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import update_projects
+from project_cache import ProjectCache
+
+
+class LegacyCache:
+    """The cache functions update_projects.py used before ProjectCache"""
+
+    def __init__(self, path, ttl=86400):
+        self.path = path
+        self.ttl = ttl
+        conn = sqlite3.connect(path)
+        conn.execute('''CREATE TABLE IF NOT EXISTS cache
+                        (key TEXT PRIMARY KEY, value TEXT, timestamp REAL)''')
+        conn.commit()
+        conn.close()
+
+    def get(self, key):
+        conn = sqlite3.connect(self.path)
+        c = conn.cursor()
+        c.execute("SELECT value, timestamp FROM cache WHERE key=?", (key,))
+        row = c.fetchone()
+        conn.close()
+        if row:
+            value, timestamp = row
+            if time.time() - timestamp < self.ttl:
+                return json.loads(value)
+        return None
+
+    def set(self, key, value):
+        conn = sqlite3.connect(self.path)
+        c = conn.cursor()
+        c.execute("INSERT OR REPLACE INTO cache (key, value, timestamp) VALUES (?, ?, ?)",
+                  (key, json.dumps(value), time.time()))
+        conn.commit()
+        conn.close()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def sample_value(i):
+    """A README-sized string or a tag list, like the real cache content"""
+    if i % 2:
+        return f"# Project {i}\n" + "Some README text. " * 100
+    return ["Python", "CLI", f"Tag{i}"]
+
+
+def run(cache, keys):
+    timings = {}
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        cache.set(key, sample_value(i))
+    cache.flush()
+    timings['write'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        assert cache.get(key) is not None
+    timings['hit'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        assert cache.get('missing_' + key) is None
+    timings['miss'] = time.perf_counter() - start
+    return timings
+
+
+def run_suite(keys=2000):
+    """Time ProjectCache on a seeded temporary cache.db; returns a flat dict of metrics (*_s in seconds)
+
+    The write phase seeds the database, then hits are read through the LRU and,
+    from a reopened cache without LRU, straight from SQLite.
+    """
+    prefixes = ['readme_owner_', 'desc_', 'tags_', 'repos_']
+    key_list = [f"{prefixes[i % len(prefixes)]}{i}" for i in range(keys)]
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.db')
+        cache = ProjectCache(path, update_projects.CACHE_NAMESPACES, update_projects.CACHE_TTLS,
+                             update_projects.CACHE_TTL, lru_size=keys)
+        timings = run(cache, key_list)
+        cache.close()
+        metrics.update({f'{name}_s': seconds for name, seconds in timings.items()})
+
+        cache = ProjectCache(path, update_projects.CACHE_NAMESPACES, update_projects.CACHE_TTLS,
+                             update_projects.CACHE_TTL, lru_size=0)
+        start = time.perf_counter()
+        for key in key_list:
+            assert cache.get(key) is not None
+        metrics['hit_sqlite_s'] = time.perf_counter() - start
+        cache.close()
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', type=int, default=2000, help="Number of cache entries")
+    args = parser.parse_args()
+
+    prefixes = ['readme_owner_', 'desc_', 'tags_', 'repos_']
+    keys = [f"{prefixes[i % len(prefixes)]}{i}" for i in range(args.keys)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = LegacyCache(os.path.join(tmp, 'legacy.db'))
+        results = {'legacy': run(legacy, keys)}
+
+        def new_cache(name, lru_size):
+            return ProjectCache(os.path.join(tmp, name), update_projects.CACHE_NAMESPACES,
+                                update_projects.CACHE_TTLS, update_projects.CACHE_TTL, lru_size=lru_size)
+
+        # LRU large enough for every key, and disabled to measure the SQLite path alone
+        for name, lru_size in (('pooled+lru', args.keys), ('pooled', 0)):
+            cache = new_cache(name + '.db', lru_size)
+            results[name] = run(cache, keys)
+            cache.close()
+
+    print(f"{args.keys} keys, seconds per operation type")
+    print(f"{'engine':>12} {'write':>9} {'hit':>9} {'miss':>9}")
+    for name, timings in results.items():
+        print(f"{name:>12} {timings['write']:>9.4f} {timings['hit']:>9.4f} {timings['miss']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
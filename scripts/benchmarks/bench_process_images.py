@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the astronaut background removal
+Compares the original per-pixel implementation with the NumPy engine in
+process_images.py on a synthetic image set, and checks the outputs match.
+Also compares the peak memory of whole-image and banded masking on one
+large image
+"""
+
+import io
+import os
+import sys
+import math
+import time
+import random
+import argparse
+import tracemalloc
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import process_images
+
+
+def legacy_remove_background(img, threshold=30, blur_radius=5):
+    """Per-pixel implementation the script used before the NumPy engine"""
+    img = img.convert('RGBA')
+
+    bg_color = img.getpixel((0, 0))
+    mask = Image.new('L', img.size, 0)
+    for y in range(img.size[1]):
+        for x in range(img.size[0]):
+            r, g, b, a = img.getpixel((x, y))
+            bg_r, bg_g, bg_b, bg_a = bg_color
+            dist = math.sqrt((r - bg_r)**2 + (g - bg_g)**2 + (b - bg_b)**2)
+            if dist < threshold:
+                mask.putpixel((x, y), 0)
+            else:
+                mask.putpixel((x, y), 255)
+
+    feathered_mask = mask.filter(ImageFilter.GaussianBlur(blur_radius))
+
+    new_img = Image.new('RGBA', img.size)
+    for y in range(img.size[1]):
+        for x in range(img.size[0]):
+            r, g, b, a = img.getpixel((x, y))
+            alpha = feathered_mask.getpixel((x, y))
+            new_img.putpixel((x, y), (r, g, b, alpha))
+    return new_img
+
+
+def make_synthetic_image(size, rng):
+    """Flat background with a few noisy shapes, similar to a Freepik preview"""
+    bg = tuple(rng.randrange(200, 256) for _ in range(3))
+    img = Image.new('RGB', (size, size), bg)
+    draw = ImageDraw.Draw(img)
+    for _ in range(6):
+        x0, y0 = rng.randrange(size), rng.randrange(size)
+        x1, y1 = x0 + rng.randrange(size // 4, size // 2), y0 + rng.randrange(size // 4, size // 2)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.ellipse((x0, y0, x1, y1), fill=color)
+        else:
+            draw.rectangle((x0, y0, x1, y1), fill=color)
+    # Light noise so some pixels sit right around the threshold
+    noise = Image.effect_noise((size, size), 12).convert('RGB')
+    return Image.blend(img, noise, 0.05)
+
+
+def time_engine(func, images):
+    start = time.perf_counter()
+    outputs = [func(img) for img in images]
+    return time.perf_counter() - start, outputs
+
+
+def peak_memory(func, *args, **kwargs):
+    """(seconds, peak MiB, result) of one call
+
+    Only allocations tracemalloc sees (NumPy arrays) are counted, not Pillow's own image buffers.
+    """
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak / 2**20, result
+
+
+def compare_bands(size, band_height, seed=0):
+    """Whole-image against banded background removal on one size x size image"""
+    img = make_synthetic_image(size, random.Random(seed))
+    whole_s, whole_mib, whole = peak_memory(process_images.remove_background, img, band_height=None)
+    banded_s, banded_mib, banded = peak_memory(process_images.remove_background, img, band_height=band_height)
+    return {
+        'whole_s': whole_s, 'whole_peak_mib': whole_mib,
+        'banded_s': banded_s, 'banded_peak_mib': banded_mib,
+        'identical': whole.tobytes() == banded.tobytes(),
+    }
+
+
+def run_suite(sizes=(128, 256, 512), count=4, seed=0):
+    """Time the current pipeline on generated RGBA images; returns a flat dict of metrics (*_s in seconds)
+
+    For every size: background removal, a plain WebP save and the quality search.
+    """
+    rng = random.Random(seed)
+    metrics = {}
+    for size in sizes:
+        images = [make_synthetic_image(size, rng).convert('RGBA') for _ in range(count)]
+        seconds, outputs = time_engine(process_images.remove_background, images)
+        metrics[f'remove_background_{size}_s'] = seconds
+        seconds, _ = time_engine(lambda img: img.save(io.BytesIO(), 'WEBP'), outputs)
+        metrics[f'webp_save_{size}_s'] = seconds
+        seconds, _ = time_engine(process_images.encode_webp, outputs)
+        metrics[f'webp_quality_search_{size}_s'] = seconds
+    bands = compare_bands(max(sizes) * 4, process_images.band_height, seed)
+    for name, value in bands.items():
+        if name != 'identical':
+            metrics[f'remove_background_{name}'] = value
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[128, 256, 512], help="Square image sizes to test")
+    parser.add_argument('--count', type=int, default=4, help="Images per size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--band-size', type=int, default=2048, help="Size of the image used for the band comparison")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>6} {'images':>6} {'before (s)':>12} {'after (s)':>12} {'speedup':>9}  identical")
+    for size in args.sizes:
+        images = [make_synthetic_image(size, rng) for _ in range(args.count)]
+        before, legacy_outputs = time_engine(legacy_remove_background, images)
+        after, outputs = time_engine(process_images.remove_background, images)
+        identical = all(a.tobytes() == b.tobytes() for a, b in zip(legacy_outputs, outputs))
+        print(f"{size:>6} {args.count:>6} {before:>12.3f} {after:>12.3f} {before / after:>8.1f}x  {identical}")
+        if not identical:
+            sys.exit(1)
+
+    bands = compare_bands(args.band_size, process_images.band_height, args.seed)
+    print(f"\n{args.band_size}x{args.band_size}, {process_images.band_height}-row bands: "
+          f"whole image {bands['whole_s']:.2f}s / {bands['whole_peak_mib']:.0f} MiB, "
+          f"banded {bands['banded_s']:.2f}s / {bands['banded_peak_mib']:.0f} MiB (NumPy peak), "
+          f"identical {bands['identical']}")
+    if not bands['identical']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the full update_projects.py flow against fake_services.py
+Times repo collection plus update_projects_json with a cold cache, a warm
+cache and --incremental, in a temporary working directory, with a fixed
+latency injected into every GitHub and OpenRouter request
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import update_projects
+from fake_services import FakeServices, mount
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def reset_clients():
+    """Drop the cache connection, scheduler and tracer so the next phase opens fresh ones"""
+    if update_projects._cache is not None:
+        update_projects._cache.close()
+    update_projects._cache = None
+    update_projects._scheduler = None
+    update_projects._tracer = None
+
+
+def run_phase(services, incremental=False, verbose=False):
+    """One main()-like run; returns (seconds, requests made)"""
+    reset_clients()
+    mount(update_projects.get_scheduler().session, services)
+    services.reset_counts()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with output:
+        update_projects.init_db()
+        repos = update_projects.collect_repos(services.username, refresh=incremental)
+        update_projects.update_projects_json(repos, [], incremental=incremental)
+        update_projects.get_cache().flush()
+    return time.perf_counter() - start, dict(services.counts)
+
+
+def run_suite(repos=20, latency=0.02, verbose=False):
+    """Cold, warm and incremental runs; returns a flat dict of metrics (*_s in seconds)"""
+    services = FakeServices(repo_count=repos, latency=latency).start()
+    saved = {name: getattr(update_projects, name) for name in
+             ('CACHE_DB', 'GITHUB_TOKEN', 'OPENROUTER_API_KEY', 'GITHUB_RATE', 'GITHUB_SEARCH_RATE', 'OPENROUTER_RATE')}
+    cwd = os.getcwd()
+    tmp = tempfile.mkdtemp(prefix='bench_update_projects_')
+    try:
+        os.makedirs(os.path.join(tmp, 'src'))
+        shutil.copy(os.path.join(REPO_ROOT, 'src', 'techIcons.json'), os.path.join(tmp, 'src'))
+        with open(os.path.join(tmp, 'src', 'projects.json'), 'w', encoding='utf-8') as f:
+            json.dump([], f)
+        os.chdir(tmp)
+
+        update_projects.CACHE_DB = os.path.join(tmp, 'cache.db')
+        # REST path, and rate limits out of the way so the timings show the client, not the buckets
+        update_projects.GITHUB_TOKEN = None
+        update_projects.OPENROUTER_API_KEY = 'bench'
+        update_projects.GITHUB_RATE = (1000, 1000)
+        update_projects.GITHUB_SEARCH_RATE = (1000, 1000)
+        update_projects.OPENROUTER_RATE = (1000, 1000)
+
+        metrics = {}
+        for phase, incremental in (('cold', False), ('warm', False), ('incremental', True)):
+            seconds, counts = run_phase(services, incremental, verbose)
+            metrics[f'{phase}_s'] = seconds
+            metrics[f'{phase}_github_requests'] = counts['github']
+            metrics[f'{phase}_openrouter_requests'] = counts['openrouter']
+        return metrics
+    finally:
+        reset_clients()
+        os.chdir(cwd)
+        for name, value in saved.items():
+            setattr(update_projects, name, value)
+        services.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repos', type=int, default=20, help="Number of fake repositories")
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds added to every fake request")
+    parser.add_argument('--verbose', action='store_true', help="Show the output of update_projects.py")
+    args = parser.parse_args()
+
+    metrics = run_suite(args.repos, args.latency, args.verbose)
+    print(f"{args.repos} repos, {args.latency * 1000:.0f} ms latency")
+    print(f"{'phase':>12} {'seconds':>9} {'github':>7} {'llm':>5}")
+    for phase in ('cold', 'warm', 'incremental'):
+        print(f"{phase:>12} {metrics[phase + '_s']:>9.3f} {metrics[phase + '_github_requests']:>7} "
+              f"{metrics[phase + '_openrouter_requests']:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Local fake of the GitHub REST API and OpenRouter used by the benchmarks
+
+Serves the endpoints update_projects.py calls on the REST path (repo
+listing with Link pagination, contributed-PR search, repo details,
+READMEs, branch heads) and the chat completions endpoint, with a fixed
+injected latency per request and ETag support. Requests reach it through
+RedirectAdapter, mounted on the session of the update_projects scheduler.
+"""
+
+import json
+import time
+import base64
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from requests.adapters import HTTPAdapter
+
+GITHUB_PREFIX = 'https://api.github.com'
+OPENROUTER_PREFIX = 'https://openrouter.ai'
+PAGE_SIZE = 30
+
+
+def make_repo(i, owner, prefix='project'):
+    day = f"2024-{(i // 28) % 12 + 1:02d}-{i % 28 + 1:02d}T00:00:00Z"
+    return {
+        'name': f'{prefix}-{i}',
+        'full_name': f'{owner}/{prefix}-{i}',
+        'html_url': f'https://github.com/{owner}/{prefix}-{i}',
+        'owner': {'login': owner},
+        'language': ['Python', 'TypeScript', 'C++', None][i % 4],
+        'fork': False,
+        'private': False,
+        'stargazers_count': i,
+        'updated_at': day,
+        'pushed_at': day,
+        'description': f'Benchmark project {i}',
+        'default_branch': 'main',
+    }
+
+
+def readme_text(name):
+    return f"# {name}\n\n" + f"{name} is a synthetic project used to benchmark the portfolio updater. " * 20
+
+
+class FakeServices:
+    def __init__(self, username='bench-user', repo_count=20, contributed=2, latency=0.02):
+        self.username = username
+        self.latency = latency
+        self.repos = [make_repo(i, username) for i in range(repo_count)]
+        self.contributed = [make_repo(i, 'upstream-org', 'library') for i in range(contributed)]
+        self.counts = {'github': 0, 'openrouter': 0, 'not_modified': 0}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def reset_counts(self):
+        with self.lock:
+            for name in self.counts:
+                self.counts[name] = 0
+
+    def find_repo(self, owner, name):
+        for repo in self.repos + self.contributed:
+            if repo['owner']['login'] == owner and repo['name'] == name:
+                return repo
+        return None
+
+    def github_response(self, path, query):
+        """(status, body, extra headers) of a GitHub GET"""
+        parts = [part for part in path.split('/') if part]
+        if parts[:1] == ['users'] and parts[2:] == ['repos']:
+            page = int(query.get('page', ['1'])[0])
+            repos = sorted(self.repos, key=lambda r: r['updated_at'], reverse=True)
+            headers = {}
+            if page * PAGE_SIZE < len(repos):
+                headers['Link'] = f'<{GITHUB_PREFIX}/users/{parts[1]}/repos?page={page + 1}>; rel="next"'
+            return 200, repos[(page - 1) * PAGE_SIZE:page * PAGE_SIZE], headers
+        if parts == ['search', 'issues']:
+            items = [{'repository_url': f"{GITHUB_PREFIX}/repos/{r['full_name']}"} for r in self.contributed]
+            return 200, {'total_count': len(items), 'items': items}, {}
+        if parts[:1] == ['repos'] and len(parts) >= 3:
+            repo = self.find_repo(parts[1], parts[2])
+            if repo is None:
+                return 404, {'message': 'Not Found'}, {}
+            if len(parts) == 3:
+                return 200, repo, {}
+            if parts[3:] == ['readme']:
+                content = base64.b64encode(readme_text(repo['name']).encode()).decode()
+                return 200, {'content': content, 'encoding': 'base64'}, {}
+            if parts[3] == 'commits':
+                sha = hashlib.sha1(repo['pushed_at'].encode()).hexdigest()
+                return 200, {'sha': sha}, {}
+        return 404, {'message': 'Not Found'}, {}
+
+    def chat_response(self, request):
+        prompt = request['messages'][0]['content']
+        if 'response_format' in request:
+            content = json.dumps({
+                'description': 'A synthetic benchmark project.',
+                'long_description': 'A synthetic project. It exists to time the updater.',
+                'tags': ['Python', 'Benchmark'],
+            })
+        elif 'tags' in prompt.lower():
+            content = 'Python, Benchmark'
+        else:
+            content = 'A synthetic benchmark project.'
+        return {'choices': [{'message': {'content': content}}], 'usage': {'total_tokens': len(prompt) // 4}}
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status, body, headers=None):
+                data = json.dumps(body).encode() if body is not None else b''
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                time.sleep(services.latency)
+                services.count('github')
+                url = urlparse(self.path)
+                status, body, headers = services.github_response(url.path, parse_qs(url.query))
+                headers['X-RateLimit-Remaining'] = '4999'
+                if status == 200:
+                    etag = '"%s"' % hashlib.md5(json.dumps(body, sort_keys=True).encode()).hexdigest()
+                    headers['ETag'] = etag
+                    if self.headers.get('If-None-Match') == etag:
+                        services.count('not_modified')
+                        return self.send(304, None, headers)
+                self.send(status, body, headers)
+
+            def do_POST(self):
+                time.sleep(services.latency)
+                services.count('openrouter')
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length))
+                self.send(200, services.chat_response(request))
+
+        return Handler
+
+
+class RedirectAdapter(HTTPAdapter):
+    """Send requests for the real API hosts to the fake server instead"""
+
+    def __init__(self, base_url, prefixes=(GITHUB_PREFIX, OPENROUTER_PREFIX)):
+        super().__init__()
+        self.base_url = base_url
+        self.prefixes = prefixes
+
+    def send(self, request, **kwargs):
+        for prefix in self.prefixes:
+            if request.url.startswith(prefix):
+                request.url = self.base_url + request.url[len(prefix):]
+                break
+        return super().send(request, **kwargs)
+
+
+def mount(session, services):
+    """Route the GitHub and OpenRouter requests of a requests session to services"""
+    adapter = RedirectAdapter(services.base_url)
+    for prefix in (GITHUB_PREFIX, OPENROUTER_PREFIX):
+        session.mount(prefix, adapter)
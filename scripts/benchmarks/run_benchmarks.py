@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Run the offline benchmark suite and store the results as JSON
+Covers image processing (bench_process_images), the project cache
+(bench_cache) and the full update_projects flow against a fake GitHub /
+OpenRouter server (bench_update_projects). Each timing is the best of
+--repeat runs. With --compare, timings are checked against an earlier
+results file and the exit code is 1 if one got slower than --threshold
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_cache
+import bench_process_images
+import bench_update_projects
+
+SUITES = {
+    'images': lambda quick: bench_process_images.run_suite(sizes=(128, 256) if quick else (128, 256, 512),
+                                                           count=2 if quick else 4),
+    'cache': lambda quick: bench_cache.run_suite(keys=500 if quick else 2000),
+    'update_projects': lambda quick: bench_update_projects.run_suite(repos=10 if quick else 30),
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def best_of(suite, quick, repeat):
+    """Run a suite repeat times, keeping the lowest value of each timing (*_s) and the last of the rest"""
+    metrics = {}
+    for _ in range(repeat):
+        for name, value in SUITES[suite](quick).items():
+            if name.endswith('_s') and name in metrics:
+                metrics[name] = min(metrics[name], value)
+            else:
+                metrics[name] = value
+    return metrics
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Print every timing next to the baseline; returns the names that regressed
+
+    A regression must be slower by both the threshold ratio and min_delta seconds,
+    so millisecond timings do not fail on scheduler noise.
+    """
+    regressions = []
+    print(f"\n{'metric':<48} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for suite, metrics in results['results'].items():
+        old_metrics = baseline.get('results', {}).get(suite, {})
+        for name, value in metrics.items():
+            old = old_metrics.get(name)
+            if not name.endswith('_s') or not old:
+                continue
+            ratio = value / old
+            flag = '  REGRESSION' if ratio > threshold and value - old > min_delta else ''
+            print(f"{suite + '.' + name:<48} {old:>10.4f} {value:>10.4f} {ratio:>6.2f}x{flag}")
+            if flag:
+                regressions.append(f"{suite}.{name}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=sorted(SUITES), help="Suites to run (default: all)")
+    parser.add_argument('--quick', action='store_true', help="Smaller inputs, for a fast sanity check")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per suite, the best timing is kept")
+    parser.add_argument('--output', help="Results file (default: benchmark_results/<timestamp>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="Earlier results file to compare with")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="Slowdown ratio reported as a regression (default 1.25)")
+    parser.add_argument('--min-delta', type=float, default=0.005,
+                        help="Seconds a timing must also lose to count as a regression (default 0.005)")
+    args = parser.parse_args()
+
+    results = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'repeat': args.repeat,
+        'results': {},
+    }
+    for suite in args.only or SUITES:
+        print(f"Running {suite}...")
+        start = time.perf_counter()
+        results['results'][suite] = best_of(suite, args.quick, args.repeat)
+        print(f"  done in {time.perf_counter() - start:.1f}s")
+
+    output = args.output or os.path.join('benchmark_results', time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('quick') != args.quick:
+            print("Warning: the baseline was run with a different --quick setting")
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} regressions above {args.threshold}x: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
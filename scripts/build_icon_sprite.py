@@ -0,0 +1,259 @@
+"""
+Build one SVG sprite from the tech icons listed in src/techIcons.json
+
+Every listed icon is minified (metadata, titles and comments dropped,
+attribute-less groups unwrapped, path data compacted and numbers rounded)
+and becomes a <symbol> whose id is derived from its file name, so ids stay
+stable between builds. Ids inside an icon (gradients, clip paths) are
+prefixed with the symbol id so icons cannot capture each other's references.
+
+The sprite is written to public/tech_icons_sprite.svg and the file name ->
+symbol id mapping, with a content-hashed sprite URL, to src/techIconSprite.json.
+The build fails if an icon listed in the JSON is missing.
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+
+# Paths
+icons_json_path = 'src/techIcons.json'
+icons_dir = 'public/tech_icons'
+sprite_path = 'public/tech_icons_sprite.svg'
+mapping_path = 'src/techIconSprite.json'
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+
+DROPPED_TAGS = {'title', 'desc', 'metadata'}
+DROPPED_ATTRIBUTES = {'version', 'baseProfile', 'enable-background', '{http://www.w3.org/XML/1998/namespace}space'}
+# Transforms are left alone: a rounded scale factor moves large coordinates by whole units
+NUMERIC_ATTRIBUTES = {
+    'points', 'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'fx', 'fy',
+    'width', 'height', 'offset', 'stroke-width', 'opacity', 'fill-opacity', 'stop-opacity',
+}
+
+NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+# Decimals inside style declarations; hex colors never contain a dot
+STYLE_DECIMAL = re.compile(r'(?<![#\w.])[-+]?\d*\.\d+')
+
+ET.register_namespace('', SVG_NS)
+
+
+def local_name(name):
+    return name.rsplit('}', 1)[-1]
+
+
+def format_number(value, decimals):
+    """Shortest text of a number rounded to decimals: 0.50 -> .5, -0.0 -> 0"""
+    text = f"{round(float(value), decimals):.{decimals}f}"
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text in ('-0', ''):
+        return '0'
+    if text.startswith('0.'):
+        return text[1:]
+    if text.startswith('-0.'):
+        return '-' + text[2:]
+    return text
+
+
+def join_numbers(tokens):
+    """Join tokens with a separator only where two numbers would otherwise merge"""
+    out = ''
+    for token in tokens:
+        if out and not token[0].isalpha() and not out[-1].isalpha():
+            # '-' always starts a new number, '.' does when the previous number already has one
+            previous = re.search(r'[-+]?[\d.]+$', out).group()
+            if not (token[0] == '-' or (token[0] == '.' and '.' in previous)):
+                out += ' '
+        out += token
+    return out
+
+
+def path_tokens(d):
+    """Split path data into commands and numbers; arc flags may be written without separators"""
+    tokens = []
+    command = None
+    index = 0
+    pos = 0
+    while pos < len(d):
+        char = d[pos]
+        if char in ' ,\t\r\n':
+            pos += 1
+        elif char.isalpha():
+            tokens.append(char)
+            command = char
+            index = 0
+            pos += 1
+        elif command in ('A', 'a') and index % 7 in (3, 4):
+            # large-arc and sweep flags are a single digit each
+            tokens.append(char)
+            index += 1
+            pos += 1
+        else:
+            match = NUMBER.match(d, pos)
+            if match is None:
+                raise ValueError(f"Invalid path data near {d[pos:pos + 20]!r}")
+            tokens.append(match.group())
+            index += 1
+            pos = match.end()
+    return tokens
+
+
+def compact_path(d, decimals):
+    tokens = [t if t.isalpha() else format_number(t, decimals) for t in path_tokens(d)]
+    return join_numbers(tokens)
+
+
+def round_numbers(value, decimals):
+    return NUMBER.sub(lambda m: format_number(m.group(), decimals), value)
+
+
+def compact_style(style, decimals):
+    declarations = [part.strip() for part in style.split(';') if part.strip()]
+    style = ';'.join(re.sub(r'\s*:\s*', ':', part) for part in declarations)
+    return STYLE_DECIMAL.sub(lambda m: format_number(m.group(), decimals), style)
+
+
+def precision_of(view_box):
+    """Decimals kept for an icon: about 4 significant digits of its largest dimension"""
+    size = max(abs(float(n)) for n in view_box.split()[2:]) or 1
+    return max(0, 3 - math.floor(math.log10(size)))
+
+
+def rewrite_references(value, prefix, ids):
+    """Point url(#id) and #id references at the prefixed ids"""
+    value = re.sub(r'url\(\s*#([^)\s]+)\s*\)',
+                   lambda m: f"url(#{prefix}{m.group(1)})" if m.group(1) in ids else m.group(), value)
+    if value.startswith('#') and value[1:] in ids:
+        value = '#' + prefix + value[1:]
+    return value
+
+
+def clean_element(element, decimals, prefix, ids):
+    """Minify an element and its children in place"""
+    for name in list(element.attrib):
+        value = element.attrib.pop(name)
+        local = local_name(name)
+        # Editor attributes (sodipodi:, inkscape:...) and the ones browsers ignore
+        if name in DROPPED_ATTRIBUTES or (name.startswith('{') and not name.startswith('{' + XLINK_NS)):
+            continue
+        if local == 'id':
+            value = prefix + value
+        elif local == 'd':
+            value = compact_path(value, decimals)
+        elif local.endswith('ransform'):
+            value = ' '.join(value.split())
+        elif local in NUMERIC_ATTRIBUTES:
+            value = round_numbers(value, decimals)
+        elif local == 'style':
+            value = compact_style(value, decimals)
+        value = rewrite_references(value.strip(), prefix, ids)
+        # xlink:href is replaced by the plain SVG 2 href
+        element.set('href' if local == 'href' else name, value)
+
+    children = []
+    for child in list(element):
+        element.remove(child)
+        if not isinstance(child.tag, str) or not child.tag.startswith('{' + SVG_NS + '}'):
+            continue
+        if local_name(child.tag) in DROPPED_TAGS:
+            continue
+        clean_element(child, decimals, prefix, ids)
+        if local_name(child.tag) == 'g' and not child.attrib:
+            # A group without attributes changes nothing, keep its children only
+            children.extend(child)
+        elif local_name(child.tag) == 'defs' and len(child) == 0:
+            continue
+        else:
+            children.append(child)
+    element.extend(children)
+    element.text = None
+    for child in children:
+        child.tail = None
+
+
+def symbol_id(filename):
+    """Stable symbol id from an icon file name: docker-svgrepo-com.svg -> icon-docker"""
+    name = os.path.splitext(filename)[0]
+    name = re.sub(r'-svgrepo-com$', '', name)
+    return 'icon-' + re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def build_symbol(path, id):
+    """Parse one icon and return it as a minified <symbol> element"""
+    root = ET.parse(path).getroot()
+    view_box = root.get('viewBox')
+    if view_box is None:
+        width = NUMBER.match(root.get('width', '0')).group()
+        height = NUMBER.match(root.get('height', '0')).group()
+        view_box = f"0 0 {width} {height}"
+    decimals = precision_of(view_box)
+
+    symbol = ET.Element(f'{{{SVG_NS}}}symbol', {'id': id, 'viewBox': round_numbers(view_box, decimals)})
+    if root.get('preserveAspectRatio'):
+        symbol.set('preserveAspectRatio', root.get('preserveAspectRatio'))
+    for name in ('style', 'fill'):
+        # Presentation attributes of the root still apply to the whole icon
+        if root.get(name):
+            symbol.set(name, root.get(name))
+
+    ids = {element.get('id') for element in root.iter() if element.get('id')}
+    symbol.extend(list(root))
+    clean_element(symbol, decimals, id + '-', ids)
+    symbol.set('id', id)
+    return symbol
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Combine the tech icons into one SVG sprite")
+    parser.parse_args()
+
+    with open(icons_json_path, 'r', encoding='utf-8') as f:
+        icons = json.load(f)
+
+    missing = [filename for filename in icons if not os.path.isfile(os.path.join(icons_dir, filename))]
+    if missing:
+        print(f"Missing icons listed in {icons_json_path}: {', '.join(missing)}")
+        sys.exit(1)
+
+    sprite = ET.Element(f'{{{SVG_NS}}}svg')
+    mapping = {}
+    source_bytes = 0
+    for filename in icons:
+        id = symbol_id(filename)
+        if id in mapping.values():
+            print(f"Icon {filename} maps to the symbol id {id} of another icon")
+            sys.exit(1)
+        path = os.path.join(icons_dir, filename)
+        source_bytes += os.path.getsize(path)
+        try:
+            sprite.append(build_symbol(path, id))
+        except (ET.ParseError, ValueError) as e:
+            print(f"Error parsing {filename}: {e}")
+            sys.exit(1)
+        mapping[filename] = id
+
+    data = ET.tostring(sprite, encoding='unicode').replace(' />', '/>').encode('utf-8')
+    with open(sprite_path, 'wb') as f:
+        f.write(data)
+
+    # The hash in the URL lets the sprite be cached forever and still update with the icons
+    version = hashlib.sha256(data).hexdigest()[:10]
+    url = '/' + os.path.relpath(sprite_path, 'public').replace(os.sep, '/')
+    with open(mapping_path, 'w', encoding='utf-8') as f:
+        json.dump({'url': f"{url}?v={version}", 'icons': mapping}, f, indent=2)
+        f.write('\n')
+
+    print(f"Wrote {sprite_path}: {len(mapping)} icons, {len(data):,} bytes ({source_bytes:,} bytes as separate files)")
+    print(f"Wrote {mapping_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Find near-duplicate astronaut images with perceptual hashes
+
+Every source image gets an aHash, a dHash and a pHash (64 bits each). Two
+images are near-duplicates when both their pHash and dHash are within a
+Hamming distance threshold; the aHash is only kept in the index to help
+tune the threshold. Candidates come from hash buckets keyed on bit chunks
+of both hashes, so the run stays far below an all-pairs comparison.
+Clusters are built around one representative, the largest image, then
+the lowest file number: every duplicate is within the threshold of it.
+
+The result is written to dedup_index.json; process_images.py skips the
+duplicates listed there, which also prunes their published outputs.
+"""
+
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+from file_utils import WorkerTask, write_json_atomic
+
+# Paths
+images_dir = 'downloaded_images'
+index_path = 'dedup_index.json'  # Hashes of every source and the duplicates found
+published_dir = 'public/astronauts'  # Only used to report the bytes saved
+
+# Matching settings
+max_distance = 6  # Maximum Hamming distance (out of 64 bits) for pHash and dHash
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II matrix, so a 2D DCT is M @ x @ M.T"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+DCT_32 = _dct_matrix(32)
+
+
+def bits_to_int(bits):
+    """Pack a boolean array into an int, first element as the most significant bit"""
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def average_hash(gray):
+    pixels = np.asarray(gray.resize((8, 8), Image.LANCZOS), dtype=np.float64)
+    return bits_to_int(pixels > pixels.mean())
+
+
+def difference_hash(gray):
+    pixels = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.float64)
+    return bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def perceptual_hash(gray):
+    pixels = np.asarray(gray.resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    # Keep the 8x8 lowest frequencies, compared to their median without the DC term
+    low = (DCT_32 @ pixels @ DCT_32.T)[:8, :8]
+    return bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def hash_image(path):
+    """Return the size and the three hashes of an image as hex strings"""
+    with Image.open(path) as img:
+        width, height = img.size
+        gray = img.convert('L')
+    return {
+        'width': width,
+        'height': height,
+        'ahash': f"{average_hash(gray):016x}",
+        'dhash': f"{difference_hash(gray):016x}",
+        'phash': f"{perceptual_hash(gray):016x}",
+    }
+
+
+# Worker entry point, tasks are (file, path)
+hash_task = WorkerTask(hash_image)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class HashBuckets:
+    """Bucket index over Hamming distance for 64-bit hashes
+
+    The hash is cut into radius + 1 disjoint bit chunks. Two hashes within
+    radius differ in at most radius chunks, so they agree exactly on at least
+    one (pigeonhole). Only the items sharing a chunk value become candidates.
+    """
+
+    def __init__(self, radius, bits=64):
+        count = min(radius + 1, bits)
+        edges = [bits * i // count for i in range(count + 1)]
+        self.chunks = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self.buckets = [{} for _ in self.chunks]
+
+    def add(self, value, item):
+        for buckets, (shift, mask) in zip(self.buckets, self.chunks):
+            buckets.setdefault((value >> shift) & mask, []).append(item)
+
+    def candidates(self, value):
+        """Every item sharing at least one chunk with value (a superset of the matches)"""
+        found = set()
+        for buckets, (shift, mask) in zip(self.buckets, self.chunks):
+            found.update(buckets.get((value >> shift) & mask, ()))
+        return found
+
+
+def load_index():
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if isinstance(index.get('hashes'), dict):
+            return index
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading dedup index, rehashing everything: {e}")
+    return {'version': 1, 'hashes': {}, 'duplicates': {}}
+
+
+def save_index(index):
+    write_json_atomic(index_path, index, sort_keys=True)
+
+
+def file_number(file):
+    digits = ''.join(c for c in os.path.splitext(file)[0] if c.isdigit())
+    return int(digits) if digits else 0
+
+
+def representative_key(file, hashes):
+    """Sort key of the best representative: largest image first, then the lowest file number"""
+    return -hashes[file]['width'] * hashes[file]['height'], file_number(file)
+
+
+def find_clusters(hashes, distance=max_distance):
+    """Group files whose pHash and dHash are both within distance of the cluster representative
+
+    Files are visited best representative first; each one not in a cluster yet
+    claims the unclaimed files near it. Every duplicate is therefore close to the
+    image it is pruned for, and A~B plus B~C never chains A and C together.
+    Returns a list of clusters, representative first.
+    """
+    phashes = HashBuckets(distance)
+    dhashes = HashBuckets(distance)
+    values = {}
+    for file in hashes:
+        values[file] = (int(hashes[file]['phash'], 16), int(hashes[file]['dhash'], 16))
+        phashes.add(values[file][0], file)
+        dhashes.add(values[file][1], file)
+
+    assigned = set()
+    clusters = []
+    for file in sorted(hashes, key=lambda f: representative_key(f, hashes)):
+        if file in assigned:
+            continue
+        assigned.add(file)
+        phash, dhash = values[file]
+        # A match must share a chunk of both hashes, which leaves very few candidates to check
+        members = [other for other in phashes.candidates(phash) & dhashes.candidates(dhash)
+                   if other not in assigned
+                   and hamming(phash, values[other][0]) <= distance and hamming(dhash, values[other][1]) <= distance]
+        if members:
+            members.sort(key=lambda f: representative_key(f, hashes))
+            assigned.update(members)
+            clusters.append([file] + members)
+    return clusters
+
+
+def representative(files, hashes):
+    """Largest image first, then the lowest file number"""
+    return min(files, key=lambda f: representative_key(f, hashes))
+
+
+def published_sizes():
+    """Total size of the outputs process_images.py published, by source base name"""
+    sizes = {}
+    if not os.path.isdir(published_dir):
+        return sizes
+    for name in os.listdir(published_dir):
+        # image_12.webp, image_12-320w.webp and image_12.avif all belong to image_12
+        base_name = os.path.splitext(name)[0].split('-')[0]
+        sizes[base_name] = sizes.get(base_name, 0) + os.path.getsize(os.path.join(published_dir, name))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate images with perceptual hashes")
+    parser.add_argument('--dir', default=images_dir, help="Directory of the source images")
+    parser.add_argument('--distance', type=int, default=max_distance,
+                        help="Maximum Hamming distance of near-duplicates (0-64)")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Number of worker processes (0 = one per CPU core)")
+    args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+
+    files = sorted((f for f in os.listdir(args.dir) if f.lower().endswith(IMAGE_EXTENSIONS)), key=file_number)
+    index = load_index()
+    hashes = {}
+
+    # Reuse the hashes of unchanged files
+    tasks = []
+    for file in files:
+        path = os.path.join(args.dir, file)
+        stat = os.stat(path)
+        entry = index['hashes'].get(file)
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+            hashes[file] = entry
+        else:
+            tasks.append((file, path))
+
+    print(f"Hashing {len(tasks)} of {len(files)} images...")
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(hash_task, tasks, chunksize=16))
+    else:
+        results = map(hash_task, tasks)
+    for file, result, error in results:
+        if error is not None:
+            print(f"Error hashing {file}: {error}")
+            continue
+        stat = os.stat(os.path.join(args.dir, file))
+        hashes[file] = {**result, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    duplicates = {}
+    for cluster in find_clusters(hashes, args.distance):
+        keep = representative(cluster, hashes)
+        for file in cluster:
+            if file != keep:
+                duplicates[file] = keep
+
+    index = {'version': 1, 'distance': args.distance, 'hashes': hashes, 'duplicates': duplicates}
+    save_index(index)
+
+    source_saved = sum(hashes[file]['size'] for file in duplicates)
+    sizes = published_sizes()
+    output_saved = sum(sizes.get(os.path.splitext(file)[0], 0) for file in duplicates)
+    print(f"Found {len(duplicates)} near-duplicates in {len(files)} images")
+    print(f"Bytes saved: {source_saved:,} of sources, {output_saved:,} of published images")
+    print(f"Wrote {index_path}")
+
+
+if __name__ == "__main__":
+    main()
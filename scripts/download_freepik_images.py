@@ -3,21 +3,48 @@ import json
 import os
 import gzip
 import brotli
+import time
+import random
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from file_utils import write_json_atomic
 
 api_url = "https://www.freepik.com/api/regular/search?filters[license]=free&locale=en&term=%40catalyststuff%20astronaut"
 
-# Create session with cookies
-session = requests.Session()
-session.cookies.set('_fcid', 'FC.66e3e032-71f2-7460-46ff-3cd63a402d95', domain='www.freepik.com')
-session.cookies.set('ph_phc_Rc6y1yvZwwwR09Pl9NtKBo5gzpxr1Ei4Bdbg3kC1Ihz_posthog', '%7B%22distinct_id%22%3A%22170754886%22%2C%22%24sesid%22%3A%5Bnull%2Cnull%2Cnull%5D%2C%22%24epp%22%3Atrue%2C%22%24initial_person_info%22%3A%7B%22r%22%3A%22https%3A%2F%2Fwww.freepik.com%2Fai%2Fimage-generator%22%2C%22u%22%3A%22https%3A%2F%2Fwww.freepik.com%2Fpikaso%2Fai-image-generator%3Fprompt%3DA%2Bdramatic%2Baerial%2Bcontrol-room%2Btheme%2Bfor%2Ban%2Bairport%2Bplanning%2Bcontest%253A%2Ba%2Bclean%252C%2Bstylized%2Bscene%2Bseen%2Bfrom%2Babove%2Bshowing%2Bseveral%2Bcircular%2Bradar%2Binfluence%2Bzones%2B%2528soft%2Bglowing%2Bdiscs%2529%2Bover%2Ba%2Bcoastal%2Bcluster%2Bof%2Bfloating%2Bair%2Bplatforms%2Band%2Ba%2Bsimplified%2Bcity%2Bgrid.%2BOverlay%2Ba%2Bcrisp%2Bminimal%2Baxis-aligned%2Brectangle%2B%2528thin%2Bneon%2Boutline%2529%2Bthat%2Bencloses%2Ball%2Bcircles%252C%2Bhighlighted%2Bin%2Ba%2Bcontrasting%2Bcolor.%2BInclude%2Bsubtle%2BAR-like%2Bgridlines%2Band%2BHUD%2Belements%252C%2Bsoft%2Bvolumetric%2Blight%252C%2Bcool%2Bblue%2Band%2Bteal%2Bpalette%2Bwith%2Bwarm%2Baccent%2B%2528orange%2529%2Bon%2Bthe%2Brectangle.%2BHigh%2Bdetail%252C%2Bsemi-realistic%252C%2Bmodern%2Bsci%25E2%2580%2591fi%2BUI%2Baesthetic%252C%2Bwide%2Bpanoramic%2Bcomposition%252C%2Bstrong%2Bnegative%2Bspace%2Bon%2Bthe%2Bright%2Bfor%2Btitle%2Btext%252C%2B3%253A1%2Baspect%2Bratio.%26submit%3D1%26style%3DnoStyle%23from_element%3Dlanding_tti%22%7D%7D', domain='.freepik.com')
-session.cookies.set('filters_test', 'C', domain='www.freepik.com')
-session.cookies.set('_fc', 'FC.96c89138-f9e9-c52a-9b84-9a92b7d44227', domain='www.freepik.com')
-session.cookies.set('sidebar_smart_bar_test', 'B2', domain='.freepik.com')
-session.cookies.set('filters-configs', '{"expanded":{"type":true,"license":true,"iconType":true},"group":[{"name":"type","show":true},{"name":"license","show":true},{"name":"iconType","show":true}],"show":false}', domain='www.freepik.com')
-session.cookies.set('GR_LGURI', 'https://www.freepik.com/free-vector/astronaut-confused-cartoon-illustration-science-technology-concept-isolated-flat-cartoon-style_16425898.htm#fromView=keyword&page=1&position=23&uuid=87aa9727-0c9c-43b6-b71d-fe8823a345dd&query=Chibi+astronaut', domain='.freepik.com')
-session.cookies.set('sb-prefs', '{"mode":"anchored"}', domain='www.freepik.com')
-session.cookies.set('search-filters', '{}', domain='www.freepik.com')
-session.cookies.set('g_state', '{"i_l":0,"i_ll":1763247199914,"i_b":"AYEgYDNieKSv/5lTB4kSy9Q5IPyeytIEMztXx0mAMQc"}', domain='www.freepik.com')
+output_dir = 'downloaded_images'
+index_path = os.path.join(output_dir, 'index.json')  # Download state, see DownloadIndex
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Concurrency and retry settings
+PAGE_WORKERS = 4
+IMAGE_WORKERS = 8
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0  # seconds, doubled after every failed attempt
+REQUEST_TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+INDEX_SAVE_EVERY = 20  # Completed downloads between index saves
+
+
+def create_session(pool_size=IMAGE_WORKERS):
+    """Create a session with the Freepik cookies and a connection pool sized for the workers"""
+    session = requests.Session()
+    session.cookies.set('_fcid', 'FC.66e3e032-71f2-7460-46ff-3cd63a402d95', domain='www.freepik.com')
+    session.cookies.set('ph_phc_Rc6y1yvZwwwR09Pl9NtKBo5gzpxr1Ei4Bdbg3kC1Ihz_posthog', '%7B%22distinct_id%22%3A%22170754886%22%2C%22%24sesid%22%3A%5Bnull%2Cnull%2Cnull%5D%2C%22%24epp%22%3Atrue%2C%22%24initial_person_info%22%3A%7B%22r%22%3A%22https%3A%2F%2Fwww.freepik.com%2Fai%2Fimage-generator%22%2C%22u%22%3A%22https%3A%2F%2Fwww.freepik.com%2Fpikaso%2Fai-image-generator%3Fprompt%3DA%2Bdramatic%2Baerial%2Bcontrol-room%2Btheme%2Bfor%2Ban%2Bairport%2Bplanning%2Bcontest%253A%2Ba%2Bclean%252C%2Bstylized%2Bscene%2Bseen%2Bfrom%2Babove%2Bshowing%2Bseveral%2Bcircular%2Bradar%2Binfluence%2Bzones%2B%2528soft%2Bglowing%2Bdiscs%2529%2Bover%2Ba%2Bcoastal%2Bcluster%2Bof%2Bfloating%2Bair%2Bplatforms%2Band%2Ba%2Bsimplified%2Bcity%2Bgrid.%2BOverlay%2Ba%2Bcrisp%2Bminimal%2Baxis-aligned%2Brectangle%2B%2528thin%2Bneon%2Boutline%2529%2Bthat%2Bencloses%2Ball%2Bcircles%252C%2Bhighlighted%2Bin%2Ba%2Bcontrasting%2Bcolor.%2BInclude%2Bsubtle%2BAR-like%2Bgridlines%2Band%2BHUD%2Belements%252C%2Bsoft%2Bvolumetric%2Blight%252C%2Bcool%2Bblue%2Band%2Bteal%2Bpalette%2Bwith%2Bwarm%2Baccent%2B%2528orange%2529%2Bon%2Bthe%2Brectangle.%2BHigh%2Bdetail%252C%2Bsemi-realistic%252C%2Bmodern%2Bsci%25E2%2580%2591fi%2BUI%2Baesthetic%252C%2Bwide%2Bpanoramic%2Bcomposition%252C%2Bstrong%2Bnegative%2Bspace%2Bon%2Bthe%2Bright%2Bfor%2Btitle%2Btext%252C%2B3%253A1%2Baspect%2Bratio.%26submit%3D1%26style%3DnoStyle%23from_element%3Dlanding_tti%22%7D%7D', domain='.freepik.com')
+    session.cookies.set('filters_test', 'C', domain='www.freepik.com')
+    session.cookies.set('_fc', 'FC.96c89138-f9e9-c52a-9b84-9a92b7d44227', domain='www.freepik.com')
+    session.cookies.set('sidebar_smart_bar_test', 'B2', domain='.freepik.com')
+    session.cookies.set('filters-configs', '{"expanded":{"type":true,"license":true,"iconType":true},"group":[{"name":"type","show":true},{"name":"license","show":true},{"name":"iconType","show":true}],"show":false}', domain='www.freepik.com')
+    session.cookies.set('GR_LGURI', 'https://www.freepik.com/free-vector/astronaut-confused-cartoon-illustration-science-technology-concept-isolated-flat-cartoon-style_16425898.htm#fromView=keyword&page=1&position=23&uuid=87aa9727-0c9c-43b6-b71d-fe8823a345dd&query=Chibi+astronaut', domain='.freepik.com')
+    session.cookies.set('sb-prefs', '{"mode":"anchored"}', domain='www.freepik.com')
+    session.cookies.set('search-filters', '{}', domain='www.freepik.com')
+    session.cookies.set('g_state', '{"i_l":0,"i_ll":1763247199914,"i_b":"AYEgYDNieKSv/5lTB4kSy9Q5IPyeytIEMztXx0mAMQc"}', domain='www.freepik.com')
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 headers = {
     'authority': 'www.freepik.com',
@@ -41,40 +68,240 @@ headers = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36'
 }
 
-# Fetch first page to get pagination info
-response = session.get(api_url, headers=headers)
-print("Status:", response.status_code)
-print("Content-Encoding:", response.headers.get('Content-Encoding'))
-data = response.json()
-
-total_pages = data['pagination']['lastPage']
-images = []
-
-# Collect all image URLs from all pages
-for page in range(1, total_pages + 1):
-    if page > 1:
-        page_url = f"{api_url}&page={page}"
-        response = session.get(page_url, headers=headers)
-        data = response.json()
-    
-    for item in data['items']:
-        img_url = item['preview']['url']
-        images.append(img_url)
-
-# Create directory for images
-os.makedirs('downloaded_images', exist_ok=True)
-
-# Download all images
-for i, img_url in enumerate(images):
+
+class RetryableStatus(Exception):
+    """Raised for responses worth retrying (rate limiting and server errors)"""
+
+
+def with_retries(func, *args, retries=MAX_RETRIES, backoff=BACKOFF_BASE):
+    """Call func, retrying network errors and 429/5xx responses with jittered exponential backoff"""
+    for attempt in range(retries + 1):
+        try:
+            return func(*args)
+        except (requests.RequestException, RetryableStatus) as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt) * (0.5 + random.random())
+            print(f"Retrying in {delay:.1f}s after error: {e}")
+            time.sleep(delay)
+
+
+def check_response(response):
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RetryableStatus(f"HTTP {response.status_code} for {response.url}")
+    response.raise_for_status()
+
+
+def fetch_page(session, url, page):
+    """Fetch one page of search results"""
+    page_url = url if page == 1 else f"{url}&page={page}"
+    response = session.get(page_url, headers=headers, timeout=REQUEST_TIMEOUT)
+    check_response(response)
+    return response.json()
+
+
+def item_key(item):
+    """Stable identity of a search result: its Freepik id, or the preview URL when there is none"""
+    return str(item['id']) if item.get('id') is not None else item['preview']['url']
+
+
+def collect_items(session, url=api_url, page_workers=PAGE_WORKERS):
+    """Fetch every search page, with up to page_workers requests in flight, and return (key, preview URL) pairs in page order"""
+    # Fetch first page to get pagination info
+    data = with_retries(fetch_page, session, url, 1)
+    total_pages = data['pagination']['lastPage']
+    print(f"Found {total_pages} pages of results")
+
+    pages = [data]
+    with ThreadPoolExecutor(max_workers=page_workers) as executor:
+        futures = [executor.submit(with_retries, fetch_page, session, url, page) for page in range(2, total_pages + 1)]
+        pages += [future.result() for future in futures]
+
+    items = {}
+    for data in pages:
+        for item in data['items']:
+            items.setdefault(item_key(item), item['preview']['url'])
+    return list(items.items())
+
+
+def url_extension(img_url):
+    # Get file extension from URL
+    return '.' + img_url.split('.')[-1].split('?')[0] if '.' in img_url else '.jpg'
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class DownloadIndex:
+    """Persistent download state, keyed by search item.
+
+    Each entry records the file an item was saved to, its content hash and the
+    ETag/Last-Modified validators of the response. Identical content is stored
+    once: items whose download matches a known hash point to the existing file.
+    """
+
+    def __init__(self, path=index_path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.next_number = 0
+        self.unsaved = 0
+        self.load()
+        self.by_hash = {e['sha256']: e['filename'] for e in self.entries.values()}
+        self.adopt_untracked_files()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data['items']
+            self.next_number = data['next_number']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error reading download index, starting fresh: {e}")
+
+    def save(self):
+        with self.lock:
+            write_json_atomic(self.path, {'next_number': self.next_number, 'items': self.entries}, sort_keys=True)
+            self.unsaved = 0
+
+    def adopt_untracked_files(self):
+        """Hash images the index does not know yet (e.g. from older runs), so matching downloads reuse them"""
+        tracked = {e['filename'] for e in self.entries.values()}
+        for name in sorted(os.listdir(output_dir)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            try:
+                number = int(name.split('_')[1].split('.')[0])
+                self.next_number = max(self.next_number, number + 1)
+            except (IndexError, ValueError):
+                pass
+            if name not in tracked:
+                self.by_hash.setdefault(file_sha256(os.path.join(output_dir, name)), name)
+
+    def conditional_headers(self, key):
+        """Validators for a revalidation request, if the item was downloaded before and its file is still there"""
+        with self.lock:
+            entry = self.entries.get(key)
+        if not entry or not os.path.exists(os.path.join(output_dir, entry['filename'])):
+            return {}
+        request_headers = {}
+        if entry.get('etag'):
+            request_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            request_headers['If-Modified-Since'] = entry['last_modified']
+        return request_headers
+
+    def record(self, key, img_url, tmp_path, sha256, etag, last_modified):
+        """Store a finished download and return (filename, status)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            existing = self.by_hash.get(sha256)
+            if existing and os.path.exists(os.path.join(output_dir, existing)):
+                # Same bytes as a file we already have
+                os.remove(tmp_path)
+                filename = existing
+                status = 'unchanged' if entry and entry['filename'] == existing else 'duplicate'
+            else:
+                ext = url_extension(img_url)
+                shared = entry and any(k != key and e['filename'] == entry['filename'] for k, e in self.entries.items())
+                if entry and not shared and entry['filename'].endswith(ext):
+                    # Changed content: replace this item's own file
+                    filename = entry['filename']
+                    self.by_hash.pop(entry['sha256'], None)
+                    status = 'updated'
+                else:
+                    filename = f"image_{self.next_number}{ext}"
+                    self.next_number += 1
+                    status = 'new'
+                os.replace(tmp_path, os.path.join(output_dir, filename))
+                self.by_hash[sha256] = filename
+            self.entries[key] = {
+                'url': img_url,
+                'filename': filename,
+                'sha256': sha256,
+                'etag': etag,
+                'last_modified': last_modified,
+            }
+            self.unsaved += 1
+            due = self.unsaved >= INDEX_SAVE_EVERY
+        if due:
+            self.save()
+        return filename, status
+
+    def filename(self, key):
+        with self.lock:
+            return self.entries[key]['filename']
+
+
+def download_item(session, store, key, img_url):
+    """Conditionally stream one preview to a temp file and hand it to the index; returns (filename, status)"""
+    tmp_path = os.path.join(output_dir, f".{hashlib.sha1(key.encode('utf-8')).hexdigest()}.part")
+    with session.get(img_url, headers=store.conditional_headers(key), stream=True, timeout=REQUEST_TIMEOUT) as img_response:
+        if img_response.status_code == 304:
+            return store.filename(key), 'not modified'
+        check_response(img_response)
+        h = hashlib.sha256()
+        with open(tmp_path, 'wb') as f:
+            for chunk in img_response.iter_content(CHUNK_SIZE):
+                h.update(chunk)
+                f.write(chunk)
+        etag = img_response.headers.get('ETag')
+        last_modified = img_response.headers.get('Last-Modified')
+    return store.record(key, img_url, tmp_path, h.hexdigest(), etag, last_modified)
+
+
+def download_task(session, store, key, img_url):
+    """Download one item and report the error instead of raising"""
     try:
-        img_response = session.get(img_url)
-        # Get file extension from URL
-        ext = img_url.split('.')[-1].split('?')[0] if '.' in img_url else 'jpg'
-        filename = f"downloaded_images/image_{i}.{ext}"
-        with open(filename, 'wb') as f:
-            f.write(img_response.content)
-        print(f"Downloaded {filename}")
+        filename, status = with_retries(download_item, session, store, key, img_url)
+        if status != 'not modified':
+            print(f"Downloaded {output_dir}/{filename} ({status})")
+        return status
     except Exception as e:
         print(f"Failed to download {img_url}: {e}")
+        return 'failed'
+
+
+def download_images(session, items, image_workers=IMAGE_WORKERS):
+    """Download new or changed items with up to image_workers transfers in flight"""
+    # Create directory for images
+    os.makedirs(output_dir, exist_ok=True)
+    store = DownloadIndex()
+
+    executor = ThreadPoolExecutor(max_workers=image_workers)
+    try:
+        futures = [executor.submit(download_task, session, store, key, img_url) for key, img_url in items]
+        statuses = [future.result() for future in futures]
+    finally:
+        # Keep what finished so an interrupted run resumes from here
+        executor.shutdown(cancel_futures=True)
+        store.save()
+
+    counts = {status: statuses.count(status) for status in sorted(set(statuses))}
+    print("Summary: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the Freepik astronaut previews")
+    parser.add_argument('--api-url', default=api_url, help="Search API URL (e.g. a local stand-in server)")
+    parser.add_argument('--page-workers', type=int, default=PAGE_WORKERS, help="Search pages fetched in parallel")
+    parser.add_argument('--image-workers', type=int, default=IMAGE_WORKERS, help="Images downloaded in parallel")
+    args = parser.parse_args()
+
+    session = create_session(max(args.page_workers, args.image_workers))
+    items = collect_items(session, args.api_url, args.page_workers)
+    print(f"Found {len(items)} images")
+
+    download_images(session, items, args.image_workers)
+    print("Download complete.")
+
 
-print("Download complete.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Helpers shared by the build and update scripts
+
+Outputs are written to a temp file next to their destination and renamed
+over it, so an interrupted run leaves either the old file or the new one,
+never a truncated one.
+"""
+
+import os
+import json
+import tempfile
+
+# mkstemp creates files readable by their owner only; outputs get the usual
+# permissions instead, so a web server running as another user can read them
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+def write_bytes_atomic(path, data):
+    """Write data to a temp file next to path and rename it over path"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_json_atomic(path, data, indent=2, **options):
+    """Write JSON atomically; options are passed to json.dumps (sort_keys, separators...)"""
+    write_bytes_atomic(path, json.dumps(data, indent=indent, **options).encode('utf-8'))
+
+
+class WorkerTask:
+    """Pool entry point running func(*args) for a (key, *args) task tuple
+
+    Returns (key, result, None), or (key, None, error message) instead of raising, so
+    one bad input is reported without stopping the pool. Instances pickle as long as
+    func is a module-level function, so they work with ProcessPoolExecutor.
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, task):
+        key, *args = task
+        try:
+            return key, self.func(*args), None
+        except Exception as e:
+            return key, None, str(e)
@@ -0,0 +1,187 @@
+"""
+Record/replay of HTTP traffic used by update_projects.py
+
+In record mode every request sent through a session goes to the network as
+usual and its response is stored in a cassette. In replay mode responses
+come from the cassette and nothing is sent, so a run is deterministic,
+needs no token and takes as long as the processing itself.
+
+Requests are matched on method, URL, conditional headers and a hash of the
+body (the prompt, for OpenRouter). Identical requests are replayed in the
+order they were recorded. Credentials are never stored, and only the
+response headers the scripts read are kept. Throttled and 5xx responses
+are not recorded, so replays never wait on a retry.
+
+A request missing from the cassette gets a 404 so the run can go on and
+report every miss, but check() then refuses to let the replay write its
+results: they would not match the recording.
+
+The cassette is gzipped JSON.
+"""
+
+import gzip
+import json
+import time
+import base64
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from file_utils import write_bytes_atomic
+from rate_limit import is_throttled
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+
+class CassetteMiss(Exception):
+    """A replay made requests the cassette doesn't hold"""
+
+# Response headers worth keeping; rate limit headers are left out so replays are never paused
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link', 'X-Poll-Interval')
+MATCHED_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+
+def request_key(request):
+    """Key of a prepared request: method, normalized URL, conditional headers and body hash"""
+    scheme, netloc, path, query, _ = urlsplit(request.url)
+    url = urlunsplit((scheme, netloc, path, urlencode(sorted(parse_qsl(query, keep_blank_values=True))), ''))
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    parts = [request.method, url]
+    parts += [f"{name}={request.headers[name]}" for name in MATCHED_HEADERS if name in request.headers]
+    if body:
+        parts.append(hashlib.sha256(body).hexdigest()[:16])
+    return ' '.join(parts)
+
+
+def encode_body(content):
+    try:
+        return {'text': content.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'base64': base64.b64encode(content).decode('ascii')}
+
+
+def decode_body(body):
+    if 'text' in body:
+        return body['text'].encode('utf-8')
+    return base64.b64decode(body['base64'])
+
+
+class Cassette:
+    def __init__(self, path, mode):
+        """mode: RECORD or REPLAY; replay loads path right away"""
+        self.path = path
+        self.mode = mode
+        self.meta = {}
+        self.interactions = {}  # request key -> list of recorded responses
+        self.positions = {}  # request key -> index of the next response to replay
+        self.misses = []
+        self.lock = threading.Lock()
+        if mode == REPLAY:
+            self.load()
+
+    def load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        self.meta = data.get('meta', {})
+        self.interactions = data['interactions']
+
+    def save(self):
+        if self.mode != RECORD:
+            return
+        with self.lock:
+            data = {'meta': dict(self.meta, recorded_at=time.strftime('%Y-%m-%dT%H:%M:%S')),
+                    'interactions': self.interactions}
+        text = json.dumps(data, sort_keys=True, separators=(',', ':'))
+        # mtime=0 keeps the file identical for an identical recording
+        write_bytes_atomic(self.path, gzip.compress(text.encode('utf-8'), mtime=0))
+
+    def record(self, key, response):
+        if is_throttled(response) or response.status_code >= 500:
+            return
+        entry = {
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            'body': encode_body(response.content),
+        }
+        with self.lock:
+            self.interactions.setdefault(key, []).append(entry)
+
+    def play(self, key):
+        """Next recorded response for key (the last one again once they are used up), or None"""
+        with self.lock:
+            entries = self.interactions.get(key)
+            if not entries:
+                self.misses.append(key)
+                return None
+            index = self.positions.get(key, 0)
+            self.positions[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def check(self):
+        """Raise CassetteMiss if a replayed request was not in the cassette"""
+        with self.lock:
+            misses = list(self.misses)
+        if misses:
+            raise CassetteMiss(f"{len(misses)} requests were not in {self.path}, first: {misses[0]}")
+
+    def mount(self, session):
+        """Route every adapter of session through the cassette"""
+        for prefix, adapter in list(session.adapters.items()):
+            if not isinstance(adapter, CassetteAdapter):
+                session.mount(prefix, CassetteAdapter(self, adapter))
+
+
+def build_response(request, entry):
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.reason = entry.get('reason')
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response.encoding = get_encoding_from_headers(response.headers) or 'utf-8'
+    response._content = decode_body(entry['body'])
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def missing_response(request):
+    """Stand-in for a request the cassette doesn't hold, a 404 the scripts handle like any failed lookup"""
+    return build_response(request, {
+        'status': 404,
+        'reason': 'Not In Cassette',
+        'headers': {'Content-Type': 'application/json'},
+        'body': {'text': json.dumps({'message': 'Not in cassette'})},
+    })
+
+
+class CassetteAdapter(BaseAdapter):
+    """Records the responses of the wrapped adapter, or replays them without calling it"""
+
+    def __init__(self, cassette, adapter):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        # The key is taken first, the wrapped adapter may rewrite the URL
+        key = request_key(request)
+        if self.cassette.mode == REPLAY:
+            entry = self.cassette.play(key)
+            if entry is None:
+                print(f"Not in cassette: {key}")
+                return missing_response(request)
+            return build_response(request, entry)
+        response = self.adapter.send(request, **kwargs)
+        self.cassette.record(key, response)
+        return response
+
+    def close(self):
+        self.adapter.close()
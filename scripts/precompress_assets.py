@@ -0,0 +1,215 @@
+"""
+Write Brotli and gzip copies of the text assets of the built site
+
+Every compressible file under the root (dist/ after `vite build` by default)
+gets a .br and a .gz sibling at the maximum compression level. A sibling is
+only kept when it is smaller than the original. Files are compressed in
+parallel.
+
+`vite build` empties dist/, so the compressed copies are also kept in
+.precompress-cache/ at the repo root, named after the content hash of their
+source. A file whose hash is in the cache gets its siblings copied from
+there instead of being compressed again.
+
+precompress-manifest.json in the root lists, for every file, its hash, its
+size and the size of each encoding written, so a static server can pick the
+sibling matching Accept-Encoding without looking at the disk.
+"""
+
+import os
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import brotli
+from file_utils import WorkerTask, write_bytes_atomic, write_json_atomic
+
+# Paths
+root_dir = 'dist'
+manifest_name = 'precompress-manifest.json'
+cache_dir = '.precompress-cache'  # Outside dist/, which the site build empties
+cache_index_name = 'index.json'  # Content hash -> size and encoded sizes
+
+# Text formats; images, fonts and PDFs are already compressed
+COMPRESSIBLE_EXTENSIONS = ('.html', '.js', '.mjs', '.css', '.json', '.svg', '.txt', '.xml', '.map', '.ico', '.webmanifest')
+ENCODINGS = ('br', 'gz')
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cached_path(cache, sha256, encoding):
+    return os.path.join(cache, f"{sha256}.{encoding}")
+
+
+def compress_file(path, sha256, cache):
+    """Compress one file into the cache and write its siblings; returns its manifest entry
+
+    Only encodings smaller than the file are kept.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    entry = {'sha256': sha256, 'size': len(data)}
+    for encoding in ENCODINGS:
+        compressed = compress(data, encoding)
+        if len(compressed) < len(data):
+            write_bytes_atomic(cached_path(cache, sha256, encoding), compressed)
+            entry[encoding] = len(compressed)
+    restore_siblings(path, entry, cache)
+    return entry
+
+
+# Worker entry point, tasks are (relative path, path, sha256, cache directory)
+compress_task = WorkerTask(compress_file)
+
+
+def cache_hit(cache, entry):
+    """The cache holds every encoding recorded for this content"""
+    return entry is not None and all(os.path.exists(cached_path(cache, entry['sha256'], encoding))
+                                     for encoding in ENCODINGS if encoding in entry)
+
+
+def restore_siblings(path, entry, cache):
+    """Copy the cached encodings of a file next to it, and remove the siblings it shouldn't have"""
+    for encoding in ENCODINGS:
+        sibling = f"{path}.{encoding}"
+        if encoding in entry:
+            shutil.copyfile(cached_path(cache, entry['sha256'], encoding), sibling)
+        elif os.path.exists(sibling):
+            # Left over from an older version that did compress well
+            os.remove(sibling)
+
+
+def find_files(root):
+    """Relative paths (with /) of the compressible files under root"""
+    files = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name == manifest_name or not name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            files.append(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, '/'))
+    return sorted(files)
+
+
+def load_manifest(path, key='files'):
+    """Load the manifest, or the cache index with key='entries'; empty if missing or invalid"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get(key), dict):
+            return manifest
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading {path}, starting from scratch: {e}")
+    return {'version': 1, key: {}}
+
+
+def save_manifest(path, manifest):
+    write_json_atomic(path, manifest, sort_keys=True)
+
+
+def remove_siblings(root, name):
+    for encoding in ENCODINGS:
+        sibling = os.path.join(root, f"{name}.{encoding}")
+        if os.path.exists(sibling):
+            os.remove(sibling)
+
+
+def prune_cache(cache, index, manifest):
+    """Keep the cache entries of the current files only, so it doesn't grow with every build"""
+    used = {entry['sha256']: entry for entry in manifest['files'].values()}
+    for sha256 in set(index['entries']) - set(used):
+        for encoding in ENCODINGS:
+            path = cached_path(cache, sha256, encoding)
+            if os.path.exists(path):
+                os.remove(path)
+    index['entries'] = {sha256: {key: value for key, value in entry.items() if key != 'sha256'}
+                        for sha256, entry in used.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write .br and .gz copies of the text assets of the built site")
+    parser.add_argument('--root', default=root_dir, help="Directory to compress (the vite build output by default)")
+    parser.add_argument('--cache', default=cache_dir, help="Directory keeping the compressed copies between builds")
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help="Number of worker processes (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true', help="Recompress every file, ignoring the cache")
+    args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+
+    if not os.path.isdir(args.root):
+        print(f"{args.root} does not exist, run the site build first")
+        return
+
+    os.makedirs(args.cache, exist_ok=True)
+    index_path = os.path.join(args.cache, cache_index_name)
+    index = load_manifest(index_path, 'entries')
+    manifest_path = os.path.join(args.root, manifest_name)
+    # Only still there when the root wasn't rebuilt since the last run
+    previous = load_manifest(manifest_path)
+    manifest = {'version': 1, 'files': {}}
+    files = find_files(args.root)
+
+    tasks = []
+    for name in files:
+        path = os.path.join(args.root, name)
+        sha256 = file_sha256(path)
+        entry = index['entries'].get(sha256)
+        entry = entry and dict(entry, sha256=sha256)
+        if not args.force and cache_hit(args.cache, entry):
+            restore_siblings(path, entry, args.cache)
+            manifest['files'][name] = entry
+        else:
+            tasks.append((name, path, sha256, args.cache))
+
+    # Siblings of files that are gone would otherwise still be served
+    for name in sorted(set(previous['files']) - set(files)):
+        remove_siblings(args.root, name)
+        print(f"Removed: {name}.br/.gz (source is gone)")
+
+    print(f"Compressing {len(tasks)} of {len(files)} files, {len(files) - len(tasks)} copied from {args.cache}...")
+    if jobs > 1 and len(tasks) > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(compress_task, tasks)
+    else:
+        executor = None
+        results = map(compress_task, tasks)
+
+    try:
+        for name, entry, error in results:
+            if error is None:
+                manifest['files'][name] = entry
+            else:
+                print(f"Error compressing {name}: {error}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        save_manifest(manifest_path, manifest)
+        prune_cache(args.cache, index, manifest)
+        save_manifest(index_path, index)
+
+    entries = list(manifest['files'].values())
+    original = sum(entry['size'] for entry in entries)
+    for encoding in ENCODINGS:
+        # Files without this encoding are served as they are
+        served = sum(entry.get(encoding, entry['size']) for entry in entries)
+        print(f"{encoding}: {served:,} of {original:,} bytes ({served / (original or 1):.1%})")
+
+
+if __name__ == "__main__":
+    main()
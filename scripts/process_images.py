@@ -1,57 +1,587 @@
+import io
 import os
-from PIL import Image, ImageFilter
+import re
+import json
 import math
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image, ImageFilter
+from file_utils import WorkerTask, write_json_atomic
 
 # Paths
 downloaded_images_dir = 'downloaded_images'
 output_dir = 'public/astronauts'
+manifest_path = 'process_manifest.json'  # Source hashes and settings of every output
+dedup_index_path = 'dedup_index.json'  # Near-duplicates found by dedup_images.py, skipped here
+asset_manifest_path = 'src/astronauts.json'  # Ids and widths of the published images, bundled by the front end
+report_path = 'process_report.json'  # WebP settings chosen for every output
+
+# Processing settings
+threshold = 30  # Adjust threshold for color similarity
+blur_radius = 5  # Gaussian feather radius for the mask edges
+band_height = 256  # Rows masked, feathered or compared at a time, bounds the memory of large images (None = whole image)
+variant_widths = (160, 320, 480)  # Downscaled copies next to the full-size image, skipped when not smaller
+
+# WebP encoder settings
+min_ssim = 0.99  # Lowest quality whose alpha-aware SSIM reaches this is used (None to disable)
+max_bytes = None  # Byte budget of a full-size image, scaled by area for the variants (None to disable)
+min_quality = 40  # Lower bound of the quality search
+search_method = 4  # Encoder effort used while searching
+final_method = 6  # Effort of the final encode, kept if it still meets the targets
+
+
+def build_mask(img, threshold=threshold, background=None):
+    """Create the hard mask: 0 where a pixel is close to the background color, 255 elsewhere
+
+    The background color is sampled from the top-left pixel unless given.
+    """
+    pixels = np.asarray(img, dtype=np.int32)
+    if background is None:
+        background = pixels[0, 0, :3]
+    diff = pixels[..., :3] - np.asarray(background, dtype=np.int32)
+    dist_sq = (diff * diff).sum(axis=-1)
+    # Comparing squared distances gives the same result as sqrt(dist) < threshold
+    mask = np.where(dist_sq < threshold * threshold, 0, 255).astype(np.uint8)
+    return Image.fromarray(mask, 'L')
+
+
+def blur_overlap(blur_radius):
+    """Rows a band needs above and below it so its feathered mask matches the whole-image one
+
+    Pillow's GaussianBlur is three box blur passes, each reading at most
+    ceil(radius) + 1 rows away.
+    """
+    return 3 * (math.ceil(blur_radius) + 1)
+
+
+def remove_background(img, threshold=threshold, blur_radius=blur_radius, band_height=band_height):
+    """Return an RGBA copy of img with the background faded out through a feathered mask
+
+    The mask is built and feathered band_height rows at a time, from the band plus
+    blur_overlap() rows on each side, and written into the alpha channel of the copy.
+    The result is the same as for the whole image at once, but the temporary arrays
+    scale with the band instead of the image. The copy itself is still full size.
+    """
+    # convert() always returns a new image, so the alpha channel can be written in place
+    img = img.convert('RGBA')
+    # The background color is sampled from the top-left pixel
+    background = img.getpixel((0, 0))[:3]
+    if not band_height or band_height >= img.height:
+        mask = build_mask(img, threshold, background)
+        # Feather the mask, keep the original colors and use it as the alpha channel
+        img.putalpha(mask.filter(ImageFilter.GaussianBlur(blur_radius)))
+        return img
+
+    overlap = blur_overlap(blur_radius)
+    for top in range(0, img.height, band_height):
+        bottom = min(top + band_height, img.height)
+        start, end = max(0, top - overlap), min(img.height, bottom + overlap)
+        mask = build_mask(img.crop((0, start, img.width, end)), threshold, background)
+        feathered_mask = mask.filter(ImageFilter.GaussianBlur(blur_radius))
+        band = img.crop((0, top, img.width, bottom))
+        band.putalpha(feathered_mask.crop((0, top - start, img.width, bottom - start)))
+        img.paste(band, (0, top))
+    return img
+
+
+def processing_params(avif=False, min_ssim=min_ssim, max_bytes=max_bytes):
+    """Settings that affect the output pixels; changing any of them triggers a rebuild"""
+    return {
+        'threshold': threshold,
+        'blur_radius': blur_radius,
+        'format': 'WEBP',
+        'widths': list(variant_widths),
+        'avif': avif,
+        'min_ssim': min_ssim,
+        'max_bytes': max_bytes,
+        'min_quality': min_quality,
+        'methods': [search_method, final_method],
+    }
+
+
+def _box_mean(a, size):
+    """Mean over every size x size window (valid positions only)
+
+    Shifted slices are summed rather than cumulative sums taken, which would lose
+    the precision of float32 on large images.
+    """
+    rows, cols = a.shape[0] - size + 1, a.shape[1] - size + 1
+    v = a[:rows].copy()
+    for i in range(1, size):
+        v += a[i:i + rows]
+    s = v[:, :cols].copy()
+    for j in range(1, size):
+        s += v[:, j:j + cols]
+    s *= 1 / (size * size)
+    return s
+
+
+def ssim_map(a, b, size=7):
+    """Structural similarity of every uniform size x size window of two 2D float arrays in the 0-255 range"""
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    mu_a = _box_mean(a, size)
+    mu_b = _box_mean(b, size)
+    var_a = _box_mean(a * a, size) - mu_a * mu_a
+    var_b = _box_mean(b * b, size) - mu_b * mu_b
+    cov = _box_mean(a * b, size) - mu_a * mu_b
+    return ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a * mu_a + mu_b * mu_b + c1) * (var_a + var_b + c2))
+
+
+def premultiplied_planes(pixels):
+    """Luma premultiplied by alpha, and alpha, as float32 arrays, from RGBA uint8 pixels
+
+    Colors under transparent pixels are invisible and the encoder may change them,
+    so they must not count against the similarity.
+    """
+    pixels = pixels.astype(np.float32)
+    alpha = pixels[..., 3]
+    luma = pixels[..., :3] @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return luma * alpha / 255, alpha
+
+
+def window_mask(alpha_a, alpha_b, size=7):
+    """SSIM windows where either image has a visible pixel
+
+    The fully transparent surroundings would otherwise push every score towards 1.
+    """
+    return (_box_mean(alpha_a, size) + _box_mean(alpha_b, size)) > 0
+
+
+def alpha_ssim(reference, data, planes=(0, 1), size=7, band_height=band_height):
+    """SSIM of encoded WebP bytes against the reference RGBA pixels, over visible windows
+
+    Returns one score per requested plane (0 = premultiplied luma, 1 = alpha).
+    Images smaller than size in either direction use a window as large as they allow.
+    The windows are scored band_height rows at a time, from the band plus the
+    size - 1 rows below it, so the float planes scale with the band instead of
+    the image.
+    """
+    with Image.open(io.BytesIO(data)) as decoded:
+        candidate = np.asarray(decoded.convert('RGBA'))
+    # Images narrower or shorter than a window are scored with the largest window that fits
+    size = min(size, *reference.shape[:2])
+    windows = reference.shape[0] - size + 1
+    step = band_height or max(windows, 1)
+    totals = [0.0] * len(planes)
+    count = 0
+    for top in range(0, windows, step):
+        bottom = min(top + step, windows) + size - 1
+        ref = premultiplied_planes(reference[top:bottom])
+        cand = premultiplied_planes(candidate[top:bottom])
+        mask = window_mask(ref[1], cand[1], size)
+        count += int(mask.sum())
+        for n, i in enumerate(planes):
+            totals[n] += float(ssim_map(ref[i], cand[i], size)[mask].sum(dtype=np.float64))
+    return tuple(total / count if count else 1.0 for total in totals)
+
+
+def encode_webp(img, min_ssim=min_ssim, max_bytes=None, band_height=band_height):
+    """Encode img as WebP with the lowest settings reaching min_ssim, lowered further to fit max_bytes
+
+    The alpha plane is encoded independently of the color quality, so
+    alpha_quality is searched against the alpha SSIM first, then quality
+    against the SSIM of the premultiplied luma (which also sees alpha errors).
+    Both searches run at search_method; the result is re-encoded at
+    final_method, which is kept if it is smaller and still meets the targets.
+    Candidates are scored band_height rows at a time (see alpha_ssim).
+    Returns (bytes, settings) where settings records the choice for the build report;
+    settings['target_met'] is False when even quality 100 (or the byte budget) left
+    the SSIM below min_ssim.
+    """
+    reference = np.asarray(img.convert('RGBA'))
+    encoded = {}
+
+    def scores_of(data, planes=(0, 1)):
+        return alpha_ssim(reference, data, planes, band_height=band_height)
+
+    def encode(quality, alpha_quality, method=search_method):
+        key = (quality, alpha_quality, method)
+        if key not in encoded:
+            buffer = io.BytesIO()
+            img.save(buffer, 'WEBP', quality=quality, alpha_quality=alpha_quality, method=method)
+            encoded[key] = buffer.getvalue()
+        return encoded[key]
+
+    def lowest(accept):
+        """Lowest value in [min_quality, 100] accepted, assuming acceptance grows with the value"""
+        lo, hi = min_quality, 100
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if accept(mid):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def highest(accept, hi):
+        """Highest value in [min_quality, hi] accepted, min_quality if none is"""
+        lo = min_quality
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if accept(mid):
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def luma_met(quality, alpha_quality):
+        return scores_of(encode(quality, alpha_quality), (0,))[0] >= min_ssim
+
+    quality = alpha_quality = 100
+    if min_ssim is not None:
+        alpha_quality = lowest(lambda a: scores_of(encode(min_quality, a), (1,))[0] >= min_ssim)
+        if not luma_met(100, alpha_quality):
+            # Alpha errors show in the premultiplied luma too, raise alpha until no color quality is short of it
+            floor = alpha_quality
+            alpha_quality = lowest(lambda a: a >= floor and luma_met(100, a))
+        # lowest() settles on 100 when nothing reaches the target, target_met below records it
+        quality = lowest(lambda q: luma_met(q, alpha_quality))
+    if max_bytes is not None:
+        # The budget wins over the SSIM target: color is given up first, then alpha
+        if len(encode(quality, alpha_quality)) > max_bytes:
+            quality = highest(lambda q: len(encode(q, alpha_quality)) <= max_bytes, quality)
+        if len(encode(quality, alpha_quality)) > max_bytes:
+            alpha_quality = highest(lambda a: len(encode(quality, a)) <= max_bytes, alpha_quality)
+
+    method = search_method
+    data = encode(quality, alpha_quality)
+    scores = scores_of(data)
+    final = encode(quality, alpha_quality, final_method)
+    if len(final) < len(data):
+        final_scores = scores_of(final)
+        # Keep the higher effort unless it loses the SSIM target the search reached
+        if min_ssim is None or min(final_scores) >= min(min(scores), min_ssim):
+            method, data, scores = final_method, final, final_scores
+
+    return data, {
+        'quality': quality,
+        'alpha_quality': alpha_quality,
+        'method': method,
+        'bytes': len(data),
+        'ssim': round(scores[0], 5),
+        'alpha_ssim': round(scores[1], 5),
+        'target_met': min_ssim is None or min(scores) >= min_ssim,
+    }
+
+
+def output_formats(params):
+    """File extensions written for every variant"""
+    return ['webp', 'avif'] if params.get('avif') else ['webp']
+
+
+def variant_name(base_name, width, ext):
+    """Output file name of a variant; width None is the full-size image"""
+    if width is None:
+        return f"{base_name}.{ext}"
+    return f"{base_name}-{width}w.{ext}"
+
+
+def output_files(entry):
+    """Every file recorded for one source in the build manifest"""
+    base_name = os.path.splitext(entry['source'])[0]
+    formats = output_formats(entry.get('params', {}))
+    widths = [None] + entry.get('variants', [])
+    return [variant_name(base_name, width, ext) for width in widths for ext in formats]
+
 
-# Ensure output directory exists
-os.makedirs(output_dir, exist_ok=True)
+def file_sha256(path):
+    """Content hash of a file, read in chunks"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
 
-# Process images
-files = [f for f in os.listdir(downloaded_images_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-files.sort(key=lambda f: int(f.split('_')[1].split('.')[0]))
 
-for file in files:
+def load_manifest():
+    """Load the build manifest, or an empty one if it is missing or unreadable"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get('outputs'), dict):
+            return manifest
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading manifest, rebuilding everything: {e}")
+    return {'version': 1, 'outputs': {}}
+
+
+def load_duplicates():
+    """Sources dedup_images.py marked as near-duplicates of another image"""
+    try:
+        with open(dedup_index_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('duplicates', {})
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Error reading dedup index, keeping every image: {e}")
+        return {}
+
+
+def save_manifest(manifest):
+    write_json_atomic(manifest_path, manifest, sort_keys=True)
+
+
+def source_fingerprint(input_path, entry):
+    """Return (size, mtime, sha256) of a source, reusing the stored hash when size and mtime match"""
+    stat = os.stat(input_path)
+    if entry and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+        return stat.st_size, stat.st_mtime, entry['sha256']
+    return stat.st_size, stat.st_mtime, file_sha256(input_path)
+
+
+def needs_rebuild(entry, file, sha256, params):
+    """Check whether an output is missing or was built from another source or other settings"""
+    if entry is None:
+        return True
+    if entry.get('source') != file or entry.get('sha256') != sha256 or entry.get('params') != params:
+        return True
+    return not all(os.path.exists(os.path.join(output_dir, name)) for name in output_files(entry))
+
+
+def remove_stale_outputs(manifest, outputs):
+    """Delete outputs recorded in the manifest whose source image is gone or no longer published"""
+    for output_name in sorted(set(manifest['outputs']) - set(outputs)):
+        remove_outputs(manifest['outputs'].pop(output_name))
+        print(f"Removed: {output_name} (source is gone or a duplicate)")
+
+
+def remove_outputs(entry):
+    """Delete the files of a manifest entry, including its variants"""
+    if 'source' not in entry:
+        return
+    for name in output_files(entry):
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def save_image(img, name, params, budget, band_height=band_height):
+    """Save one variant in every output format; returns the WebP encoder settings"""
+    settings = None
+    for ext in output_formats(params):
+        path = os.path.join(output_dir, variant_name(*name, ext))
+        if ext == 'webp':
+            data, settings = encode_webp(img, params['min_ssim'], budget, band_height)
+            with open(path, 'wb') as f:
+                f.write(data)
+        else:
+            img.save(path, ext.upper())
+    return settings
+
+
+def save_variants(img, base_name, params, band_height=band_height):
+    """Save the full-size image and its downscaled variants
+
+    Returns the variant widths written and the WebP settings chosen for every file.
+    """
+    max_bytes = params['max_bytes']
+    encodings = {variant_name(base_name, None, 'webp'): save_image(img, (base_name, None), params, max_bytes, band_height)}
+
+    widths = []
+    for width in params['widths']:
+        if width >= img.width:
+            continue
+        height = max(1, round(img.height * width / img.width))
+        # Alpha is premultiplied while resampling, so no background color bleeds into the edges
+        resized = img.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        # The byte budget shrinks with the pixel count
+        budget = max_bytes and int(max_bytes * width * height / (img.width * img.height))
+        encodings[variant_name(base_name, width, 'webp')] = save_image(resized, (base_name, width), params, budget, band_height)
+        widths.append(width)
+    return {'variants': widths, 'encodings': encodings}
+
+
+def process_file(input_path, base_name, params, band_height=band_height):
+    """Remove the background of one source image and save it with its variants"""
+    with Image.open(input_path) as img:
+        new_img = remove_background(img, band_height=band_height)
+    return save_variants(new_img, base_name, params, band_height)
+
+
+# Worker entry point, tasks are (file, input path, base name, params, band height)
+process_task = WorkerTask(process_file)
+
+
+def image_id(name):
+    """Numeric id of a published file name such as image_12.webp or image_12-320w.webp, or None"""
+    match = re.fullmatch(r'image_(\d+)(?:-(\d+)w)?\.(webp|avif)', name)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2)) if match.group(2) else None, match.group(3)
+
+
+def build_asset_manifest():
+    """List the images present in output_dir for the front-end bundle: id, widths and AVIF
+
+    The files on disk are the source of truth, so the front end never picks an id that 404s.
+    widths holds the variant widths, then the width of the full-size image, which has
+    no width in its file name. Byte sizes and heights stay in process_report.json, the
+    bundle only carries what the srcset needs.
+    """
+    images = {}
+    for name in os.listdir(output_dir):
+        parsed = image_id(name)
+        if parsed is None:
+            continue
+        id, width, ext = parsed
+        images.setdefault(id, {}).setdefault(width, set()).add(ext)
+
+    entries = []
+    for id in sorted(images):
+        variants = images[id]
+        if 'webp' not in variants.get(None, ()):
+            continue
+        # Only the header is read to get the size
+        with Image.open(os.path.join(output_dir, variant_name(f"image_{id}", None, 'webp'))) as img:
+            full_width = img.width
+        widths = sorted(width for width in variants if width is not None and 'webp' in variants[width])
+        entry = {'id': id, 'widths': widths + [full_width]}
+        if all('avif' in variants[width] for width in widths + [None]):
+            entry['avif'] = True
+        entries.append(entry)
+    return {'version': 2, 'path': '/' + os.path.relpath(output_dir, 'public').replace(os.sep, '/'), 'images': entries}
+
+
+def write_report(manifest):
+    """Write the WebP settings chosen for every output, with totals, to report_path"""
+    encodings = {}
+    for entry in manifest['outputs'].values():
+        encodings.update(entry.get('encodings', {}))
+    settings = list(encodings.values())
+    count = len(settings) or 1
+    report = {
+        'files': len(settings),
+        'bytes': sum(s['bytes'] for s in settings),
+        'mean_quality': round(sum(s['quality'] for s in settings) / count, 2),
+        'mean_alpha_quality': round(sum(s['alpha_quality'] for s in settings) / count, 2),
+        'lowest_ssim': min((min(s['ssim'], s['alpha_ssim']) for s in settings), default=None),
+        # Outputs of manifests written before the flag existed count as met
+        'target_missed': sorted(name for name, s in encodings.items() if not s.get('target_met', True)),
+        'outputs': encodings,
+    }
+    write_json_atomic(report_path, report, sort_keys=True)
+    print(f"Wrote {report_path} ({report['files']} WebP files, {report['bytes']:,} bytes)")
+    if report['target_missed']:
+        print(f"Warning: {len(report['target_missed'])} WebP files are below the SSIM target, "
+              f"see target_missed in {report_path}")
+
+
+def write_asset_manifest():
+    manifest = build_asset_manifest()
+    write_json_atomic(asset_manifest_path, manifest, indent=None, separators=(',', ':'))
+    print(f"Wrote {asset_manifest_path} ({len(manifest['images'])} images)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove the background of the downloaded astronaut images")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Number of worker processes (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="Rebuild every output even if the manifest says it is up to date")
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help="Also publish the near-duplicates listed in the dedup index")
+    parser.add_argument('--avif', action='store_true',
+                        help="Also write an AVIF copy of every variant")
+    parser.add_argument('--min-ssim', type=float, default=min_ssim,
+                        help="Lowest alpha-aware SSIM of the WebP outputs (0 = always quality 100)")
+    parser.add_argument('--max-bytes', type=int, default=max_bytes,
+                        help="Byte budget of a full-size WebP, scaled by area for the variants")
+    parser.add_argument('--band-height', type=int, default=band_height,
+                        help="Rows masked or compared at a time, lower it to save memory on large images (0 = whole image)")
+    parser.add_argument('--manifest-only', action='store_true',
+                        help="Only regenerate the asset manifest from the files in the output directory")
+    args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+
+    # Ensure output directory exists
+    os.makedirs(output_dir, exist_ok=True)
+
+    if args.manifest_only:
+        write_asset_manifest()
+        return
+
+    # Process images
+    files = [f for f in os.listdir(downloaded_images_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+    files.sort(key=lambda f: int(f.split('_')[1].split('.')[0]))
+
+    if not args.keep_duplicates:
+        duplicates = load_duplicates()
+        kept = [f for f in files if f not in duplicates]
+        if len(kept) < len(files):
+            print(f"Skipping {len(files) - len(kept)} near-duplicates listed in {dedup_index_path}")
+        files = kept
+
+    manifest = load_manifest()
+    params = processing_params(args.avif, args.min_ssim or None, args.max_bytes)
+
+    tasks = []
+    pending = {}  # file -> (output name, manifest entry to record once it is built)
+    outputs = set()
+    for file in files:
         input_path = os.path.join(downloaded_images_dir, file)
         base_name = os.path.splitext(file)[0]
-        output_path = os.path.join(output_dir, base_name + '.webp')
-        
-        if not os.path.exists(output_path):
-            try:
-                with Image.open(input_path) as img:
-                    img = img.convert('RGBA')
-                    
-                    # Create hard mask
-                    bg_color = img.getpixel((0, 0))
-                    mask = Image.new('L', img.size, 0)
-                    threshold = 30  # Adjust threshold for color similarity
-                    for y in range(img.size[1]):
-                        for x in range(img.size[0]):
-                            pixel = img.getpixel((x, y))
-                            r, g, b, a = pixel
-                            bg_r, bg_g, bg_b, bg_a = bg_color
-                            dist = math.sqrt((r - bg_r)**2 + (g - bg_g)**2 + (b - bg_b)**2)
-                            if dist < threshold:
-                                mask.putpixel((x, y), 0)
-                            else:
-                                mask.putpixel((x, y), 255)
-                    
-                    # Feather the mask
-                    feathered_mask = mask.filter(ImageFilter.GaussianBlur(5))
-                    
-                    # Create image with soft edges
-                    new_img = Image.new('RGBA', img.size)
-                    for y in range(img.size[1]):
-                        for x in range(img.size[0]):
-                            r, g, b, a = img.getpixel((x, y))
-                            alpha = feathered_mask.getpixel((x, y))
-                            new_img.putpixel((x, y), (r, g, b, alpha))
-                    
-                    new_img.save(output_path, 'WEBP')
-                print(f"Processed: {file} -> {base_name}.webp")
-            except Exception as e:
-                print(f"Error processing {file}: {e}")
-
-print("Processing complete.")
\ No newline at end of file
+        output_name = base_name + '.webp'
+        outputs.add(output_name)
+
+        entry = manifest['outputs'].get(output_name)
+        size, mtime, sha256 = source_fingerprint(input_path, entry)
+        new_entry = {'source': file, 'sha256': sha256, 'size': size, 'mtime': mtime, 'params': params}
+
+        if args.force or needs_rebuild(entry, file, sha256, params):
+            if entry is not None:
+                # Variants of the previous settings (e.g. a dropped width or AVIF) would be left behind
+                remove_outputs(entry)
+            # The band height doesn't change the output, so it is not part of params
+            tasks.append((file, input_path, base_name, params, args.band_height or None))
+            pending[file] = (output_name, new_entry)
+        else:
+            new_entry['variants'] = entry.get('variants', [])
+            new_entry['encodings'] = entry.get('encodings', {})
+            if entry != new_entry:
+                # Same content, only the file stats moved (e.g. a fresh copy)
+                manifest['outputs'][output_name] = new_entry
+
+    remove_stale_outputs(manifest, outputs)
+
+    if jobs > 1 and len(tasks) > 1:
+        print(f"Processing {len(tasks)} images with {jobs} workers...")
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        # map() yields results in submission order, so the log keeps the numeric ordering
+        results = executor.map(process_task, tasks)
+    else:
+        executor = None
+        results = map(process_task, tasks)
+
+    try:
+        for i, (file, result, error) in enumerate(results, 1):
+            base_name = os.path.splitext(file)[0]
+            output_name, new_entry = pending[file]
+            if error is None:
+                new_entry.update(result)
+                manifest['outputs'][output_name] = new_entry
+                settings = result['encodings'][output_name]
+                print(f"[{i}/{len(tasks)}] Processed: {file} -> {base_name}.webp "
+                      f"(+{len(result['variants'])} smaller, q{settings['quality']}, {settings['bytes']:,} bytes"
+                      f"{'' if settings['target_met'] else ', below the SSIM target'})")
+            else:
+                # Forget the entry so the next run retries this file
+                manifest['outputs'].pop(output_name, None)
+                print(f"[{i}/{len(tasks)}] Error processing {file}: {error}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        # Saved even on interruption so finished outputs are not rebuilt next time
+        save_manifest(manifest)
+
+    write_report(manifest)
+    write_asset_manifest()
+    print("Processing complete.")
+
+
+if __name__ == "__main__":
+    main()
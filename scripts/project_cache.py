@@ -0,0 +1,182 @@
+"""
+SQLite-backed cache used by update_projects.py
+
+One connection is kept open for the whole run (WAL mode, batched commits)
+with a small in-process LRU in front of it. Keys are grouped into
+namespaces by prefix, and every namespace has its own TTL.
+
+Entries can also carry the ETag/Last-Modified validators of the HTTP
+response they came from, so expired entries can be revalidated, and a
+fingerprint of the input they were derived from (e.g. a README hash).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+COLUMNS = "value, timestamp, etag, last_modified, fingerprint"
+
+
+class ProjectCache:
+    def __init__(self, path, namespaces, ttls, default_ttl, lru_size=512, commit_every=50, stale_ttl=30 * 86400):
+        """
+        namespaces: list of (key prefix, namespace) pairs
+        ttls: namespace -> TTL in seconds (None never expires)
+        default_ttl: TTL of keys matching no prefix
+        stale_ttl: how long expired entries with HTTP validators are kept for revalidation
+        """
+        self.stale_ttl = stale_ttl
+        self.namespaces = namespaces
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.lru_size = lru_size
+        self.commit_every = commit_every
+        self.lru = OrderedDict()  # key -> row tuple, see COLUMNS
+        self.pending_writes = 0
+        self.lock = threading.RLock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS cache
+                             (key TEXT PRIMARY KEY, value TEXT, timestamp REAL)''')
+        self._migrate()
+        self.conn.commit()
+
+    def _migrate(self):
+        """Add the columns missing from databases created by older versions"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(cache)")}
+        for column in ('namespace', 'etag', 'last_modified', 'fingerprint'):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE cache ADD COLUMN {column} TEXT")
+        rows = self.conn.execute("SELECT key FROM cache WHERE namespace IS NULL").fetchall()
+        self.conn.executemany("UPDATE cache SET namespace=? WHERE key=?",
+                              [(self.namespace_of(key), key) for key, in rows])
+        self.conn.execute("CREATE INDEX IF NOT EXISTS cache_namespace_timestamp ON cache (namespace, timestamp)")
+
+    def namespace_of(self, key):
+        for prefix, namespace in self.namespaces:
+            if key.startswith(prefix):
+                return namespace
+        return 'default'
+
+    def ttl_of(self, namespace):
+        return self.ttls.get(namespace, self.default_ttl)
+
+    def _is_fresh(self, key, timestamp):
+        ttl = self.ttl_of(self.namespace_of(key))
+        return ttl is None or time.time() - timestamp < ttl
+
+    def _remember(self, key, row):
+        self.lru[key] = row
+        self.lru.move_to_end(key)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def _row(self, key):
+        with self.lock:
+            row = self.lru.get(key)
+            if row is not None:
+                self.lru.move_to_end(key)
+                return row
+            row = self.conn.execute(f"SELECT {COLUMNS} FROM cache WHERE key=?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row)
+            return row
+
+    def get(self, key, fingerprint=None):
+        """Return the cached value, or None if it is missing or expired
+
+        When a fingerprint is given, an entry recorded with a different one is a miss.
+        Entries stored without a fingerprint adopt the given one.
+        """
+        row = self._row(key)
+        if row is None:
+            return None
+        text, timestamp, etag, last_modified, stored_fingerprint = row
+        if not self._is_fresh(key, timestamp):
+            return None
+        if fingerprint is not None:
+            if stored_fingerprint is None:
+                self._update(key, (text, timestamp, etag, last_modified, fingerprint))
+            elif stored_fingerprint != fingerprint:
+                return None
+        # Decode on every hit so callers never share (and mutate) one object
+        return json.loads(text)
+
+    def get_entry(self, key):
+        """Return the entry with its validators even if it expired, as a dict, or None"""
+        row = self._row(key)
+        if row is None:
+            return None
+        text, timestamp, etag, last_modified, fingerprint = row
+        return {
+            'value': json.loads(text),
+            'fresh': self._is_fresh(key, timestamp),
+            'timestamp': timestamp,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fingerprint': fingerprint,
+        }
+
+    def set(self, key, value, etag=None, last_modified=None, fingerprint=None):
+        """Store a value; the write is committed with the next batch"""
+        self._update(key, (json.dumps(value), time.time(), etag, last_modified, fingerprint))
+
+    def touch(self, key):
+        """Restart the TTL of an entry, e.g. after a 304 Not Modified"""
+        row = self._row(key)
+        if row is not None:
+            self._update(key, (row[0], time.time()) + tuple(row[2:]))
+
+    def _update(self, key, row):
+        with self.lock:
+            self.conn.execute(f"INSERT OR REPLACE INTO cache (key, namespace, {COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (key, self.namespace_of(key)) + tuple(row))
+            self._remember(key, tuple(row))
+            self.pending_writes += 1
+            if self.pending_writes >= self.commit_every:
+                self.flush()
+
+    def flush(self):
+        """Commit pending writes"""
+        with self.lock:
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def evict(self, vacuum=False):
+        """Delete expired rows of every namespace and optionally compact the file; returns the number of rows removed
+
+        Expired rows with an ETag or Last-Modified are kept for stale_ttl more seconds.
+        """
+        now = time.time()
+        with self.lock:
+            removed = 0
+            namespaces = [row[0] for row in self.conn.execute("SELECT DISTINCT namespace FROM cache")]
+            for namespace in namespaces:
+                ttl = self.ttl_of(namespace)
+                if ttl is None:
+                    continue
+                cursor = self.conn.execute(
+                    "DELETE FROM cache WHERE namespace=? AND timestamp < ? AND etag IS NULL AND last_modified IS NULL",
+                    (namespace, now - ttl))
+                removed += cursor.rowcount
+                # Entries that can still be revalidated get a grace period
+                cursor = self.conn.execute("DELETE FROM cache WHERE namespace=? AND timestamp < ?",
+                                           (namespace, now - ttl - self.stale_ttl))
+                removed += cursor.rowcount
+            self.lru.clear()
+            self.flush()
+            if vacuum:
+                self.conn.execute("VACUUM")
+            return removed
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.flush()
+                self.conn.close()
+                self.conn = None
@@ -0,0 +1,179 @@
+"""
+Rate-limit-aware request scheduler used by update_projects.py
+
+Every API gets a token bucket. Buckets are refilled at a fixed rate and
+corrected from the X-RateLimit-Remaining / X-RateLimit-Reset / Retry-After
+headers of each response. Throttled (429, secondary-limit 403) and 5xx
+responses are retried with jittered exponential backoff. High-priority
+requests (cheap cache revalidations) are served before normal ones and
+may use a reserve of tokens normal requests leave alone.
+"""
+
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HIGH = 0
+NORMAL = 1
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, reserve=0, max_concurrency=None):
+        """
+        rate: tokens added per second
+        capacity: maximum burst
+        reserve: tokens only high-priority requests may take
+        max_concurrency: maximum requests in flight (None for no limit)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = reserve
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.high_waiting = 0
+        self.condition = threading.Condition()
+        self.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _wait_time(self, priority):
+        """Seconds until a request of this priority may go, 0 if it may go now"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if priority != HIGH and self.high_waiting:
+            return 0.05
+        floor = 1 if priority == HIGH else 1 + self.reserve
+        if self.tokens >= floor:
+            return 0
+        return (floor - self.tokens) / self.rate
+
+    def acquire(self, priority=NORMAL):
+        """Block until a token is available for this priority, then take it"""
+        with self.condition:
+            if priority == HIGH:
+                self.high_waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    wait = self._wait_time(priority)
+                    if wait <= 0:
+                        self.tokens -= 1
+                        break
+                    self.condition.wait(wait)
+            finally:
+                if priority == HIGH:
+                    self.high_waiting -= 1
+                    self.condition.notify_all()
+        if self.slots:
+            self.slots.acquire()
+
+    def release(self):
+        if self.slots:
+            self.slots.release()
+
+    def pause(self, seconds):
+        """Stop handing out tokens for a while (e.g. Retry-After or an exhausted quota)"""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.condition.notify_all()
+
+    def observe(self, response):
+        """Correct the bucket from the rate limit headers of a response"""
+        headers = response.headers
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        with self.condition:
+            if remaining is not None and remaining.isdigit():
+                self._refill()
+                self.tokens = min(self.tokens, int(remaining))
+                if int(remaining) == 0 and reset:
+                    self.pause(reset_delay(reset))
+        retry_after = retry_after_delay(response)
+        if retry_after is not None:
+            self.pause(retry_after)
+
+
+def reset_delay(reset):
+    """Seconds until an X-RateLimit-Reset epoch (seconds, or milliseconds for OpenRouter)"""
+    try:
+        reset = float(reset)
+    except ValueError:
+        return 0
+    if reset > 1e12:
+        reset /= 1000
+    return max(0, reset - time.time())
+
+
+def retry_after_delay(response):
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        return None
+
+
+def is_throttled(response):
+    """429, or a 403 caused by GitHub's primary or secondary rate limit"""
+    if response.status_code == 429:
+        return True
+    if response.status_code == 403:
+        if response.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in response.headers:
+            return True
+        return 'rate limit' in response.text.lower()
+    return False
+
+
+class RequestScheduler:
+    def __init__(self, buckets, max_retries=4, backoff_base=1.0, max_backoff=60, pool_size=10):
+        """buckets: API name -> TokenBucket"""
+        self.buckets = buckets
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def backoff(self, attempt):
+        return min(self.max_backoff, self.backoff_base * (2 ** attempt)) * (0.5 + random.random())
+
+    def request(self, api, method, url, priority=NORMAL, **kwargs):
+        """Send a request through the bucket of api, retrying throttled, 5xx and failed requests
+
+        Returns the last response once retries are exhausted; re-raises the last
+        network error if no response was ever received.
+        """
+        bucket = self.buckets[api]
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire(priority)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                print(f"{api} request failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            finally:
+                bucket.release()
+
+            bucket.observe(response)
+            retryable = is_throttled(response) or response.status_code >= 500
+            if not retryable or attempt == self.max_retries:
+                return response
+            # Retry-After/reset pauses the bucket itself; this only spreads the retries out
+            delay = self.backoff(attempt)
+            print(f"{api} returned {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
@@ -0,0 +1,131 @@
+"""
+Span and counter instrumentation used by update_projects.py
+
+A span times one step of the run (a GitHub request, an LLM call, a cache
+lookup, the generation of one field) and carries attributes such as the
+repo, the HTTP status, the response size or whether the cache answered.
+Spans opened inside another span of the same thread inherit its repo, so
+requests are attributed to the repo and phase that made them. Counters
+add up events that are not worth a span.
+
+At the end of a run the tracer writes a JSON report with totals per span
+name, per repo and per counter, or a Chrome trace (chrome://tracing,
+Perfetto) with one event per span.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+INHERITED_ATTRIBUTES = ('repo',)
+
+
+class Tracer:
+    def __init__(self, max_spans=100000):
+        """max_spans: spans kept for the span list and the Chrome trace; totals count every span"""
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped_spans = 0
+        self.phases = {}  # span name -> totals
+        self.repos = {}  # repo -> span name -> seconds
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+
+    def _stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the block; yields the attribute dict so the block can add attributes (status, bytes...)"""
+        stack = self._stack()
+        if stack:
+            for key in INHERITED_ATTRIBUTES:
+                if key not in attrs and key in stack[-1][1]:
+                    attrs[key] = stack[-1][1][key]
+        stack.append((name, attrs))
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs.setdefault('error', type(e).__name__)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            self._record(name, start, duration, attrs, stack[-1][0] if stack else None)
+
+    def _record(self, name, start, duration, attrs, parent):
+        with self.lock:
+            totals = self.phases.setdefault(name, {'count': 0, 'total_s': 0.0, 'max_s': 0.0, 'errors': 0})
+            totals['count'] += 1
+            totals['total_s'] += duration
+            totals['max_s'] = max(totals['max_s'], duration)
+            if 'error' in attrs:
+                totals['errors'] += 1
+            if attrs.get('repo'):
+                repo = self.repos.setdefault(attrs['repo'], {})
+                repo[name] = repo.get(name, 0.0) + duration
+            if len(self.spans) < self.max_spans:
+                self.spans.append({
+                    'name': name,
+                    'parent': parent,
+                    'start_s': start - self.start,
+                    'duration_s': duration,
+                    'thread': threading.current_thread().name,
+                    'attrs': dict(attrs),
+                })
+            else:
+                self.dropped_spans += 1
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self):
+        """Run summary: totals per span name, seconds per repo and span name, counters and the spans"""
+        with self.lock:
+            return {
+                'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+                'duration_s': time.perf_counter() - self.start,
+                'phases': {name: dict(totals) for name, totals in sorted(self.phases.items())},
+                'repos': {repo: dict(phases) for repo, phases in sorted(self.repos.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'dropped_spans': self.dropped_spans,
+                'spans': list(self.spans),
+            }
+
+    def chrome_trace(self):
+        """The spans as Chrome trace events ('X' complete events, one track per thread)"""
+        pid = os.getpid()
+        with self.lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        threads = {}
+        events = []
+        for span in spans:
+            tid = threads.setdefault(span['thread'], len(threads) + 1)
+            events.append({
+                'name': span['name'],
+                'cat': span['name'],
+                'ph': 'X',
+                'ts': span['start_s'] * 1e6,
+                'dur': span['duration_s'] * 1e6,
+                'pid': pid,
+                'tid': tid,
+                'args': span['attrs'],
+            })
+        for thread, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'counters': counters}}
+
+    def write(self, path, chrome=False):
+        data = self.chrome_trace() if chrome else self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=None if chrome else 2, default=str)
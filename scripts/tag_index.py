@@ -0,0 +1,141 @@
+"""
+Tag index used by update_projects.py to pick and normalize technical tags
+
+The index knows every tag of the portfolio: the tech icon names of
+src/techIcons.json, the tags of src/projects.json and a table of common
+aliases (JS -> JavaScript, cpp -> C++, ...). Tags are compared on a key
+that ignores case, spaces, dots and dashes, so "Node.js", "nodejs" and
+"Node JS" are the same tag.
+
+For a repo, candidates() ranks the known tags by how often the README
+mentions them, with a boost for the repo language and a small prior for
+tags many projects already use, and returns the top k. Prompts then
+carry a bounded list of likely tags instead of every tag ever generated.
+canonical() maps a generated tag onto the known spelling.
+"""
+
+import re
+import math
+from collections import Counter
+
+# Normalized alias -> canonical name
+ALIASES = {
+    'js': 'JavaScript',
+    'es6': 'JavaScript',
+    'ts': 'TypeScript',
+    'py': 'Python',
+    'python3': 'Python',
+    'cpp': 'C++',
+    'cplusplus': 'C++',
+    'csharp': 'C#',
+    'golang': 'Go',
+    'node': 'Node.js',
+    'reactjs': 'React',
+    'tailwindcss': 'Tailwind',
+    'html5': 'HTML',
+    'css3': 'CSS',
+    'sqlite3': 'SQLite',
+    'postgres': 'PostgreSQL',
+    'vscode': 'VS Code',
+    'visualstudiocode': 'VS Code',
+    'unity3d': 'Unity',
+    'jupyternotebook': 'Jupyter',
+    'ipynb': 'Jupyter',
+    'ml': 'Machine Learning',
+    'ai': 'AI',
+    'artificialintelligence': 'AI',
+    'dl': 'Deep Learning',
+}
+
+LANGUAGE_BOOST = 3.0  # Added to the repo language, which clean_tags puts first anyway
+PRIOR_WEIGHT = 0.25  # Times log(1 + projects using the tag)
+
+TOKEN = re.compile(r"[A-Za-z0-9][A-Za-z0-9+#.\-]*")
+
+
+def tag_key(tag):
+    """Comparison key of a tag: lowercase, without spaces, dots, dashes and underscores"""
+    return re.sub(r'[\s._\-]+', '', tag.strip().lower())
+
+
+def text_keys(text):
+    """Key -> occurrences of every word and pair of adjacent words in text
+
+    Pairs catch multi-word tags ("machine learning", "node js"). Words of one or two
+    letters are kept in their original case (prefixed with '='), so "Go" or "C" only
+    match as written and not the common words "go" or "c".
+    """
+    words = [word.rstrip('.-') for word in TOKEN.findall(text)]
+    keys = Counter()
+    for i, word in enumerate(words):
+        key = tag_key(word)
+        keys['=' + word if len(key) <= 2 else key] += 1
+        if i + 1 < len(words):
+            keys[key + tag_key(words[i + 1])] += 1
+    return keys
+
+
+class TagIndex:
+    def __init__(self, icon_names=(), project_tags=()):
+        """
+        icon_names: tech icon names, whose spelling wins over the others
+        project_tags: one list of tags per existing project
+        """
+        self.names = {}  # key -> canonical name
+        self.counts = Counter()  # canonical name -> projects using it
+        for name in icon_names:
+            self.names.setdefault(tag_key(name), name)
+        for name in ALIASES.values():
+            self.names.setdefault(tag_key(name), name)
+        for tags in project_tags:
+            self.add(tags)
+
+    def canonical(self, tag):
+        """Known spelling of a tag, or the tag itself (stripped) if it is new"""
+        tag = tag.strip()
+        key = tag_key(tag)
+        return ALIASES.get(key) or self.names.get(key) or tag
+
+    def canonicalize(self, tags):
+        """Canonical names of tags, without duplicates, in their original order"""
+        seen = set()
+        result = []
+        for tag in tags:
+            name = self.canonical(tag)
+            if name and name not in seen:
+                seen.add(name)
+                result.append(name)
+        return result
+
+    def add(self, tags):
+        """Count the tags of one project; new tags become known"""
+        for name in self.canonicalize(tags):
+            self.names.setdefault(tag_key(name), name)
+            self.counts[name] += 1
+
+    def match_keys(self, name):
+        """Text keys that count as a mention of a canonical tag (see text_keys for short words)"""
+        keys = set()
+        for key in {tag_key(name)} | {alias for alias, target in ALIASES.items() if target == name}:
+            if key == tag_key(name) and len(key) <= 2:
+                keys.add('=' + name)
+            elif len(key) <= 2:
+                # Short aliases are acronyms: js, JS
+                keys.update(('=' + key, '=' + key.upper()))
+            else:
+                keys.add(key)
+        return keys
+
+    def candidates(self, language, text, k):
+        """The k known tags most relevant to a repo, most relevant first"""
+        mentions = text_keys(text)
+        language = self.canonical(language) if language else None
+        scores = []
+        for name in set(self.names.values()):
+            tf = sum(mentions[key] for key in self.match_keys(name))
+            score = (1 + math.log(tf) if tf else 0) + PRIOR_WEIGHT * math.log1p(self.counts[name])
+            if name == language:
+                score += LANGUAGE_BOOST
+            scores.append((-score, name))
+        # Ties are broken by name so the same inputs always give the same prompt
+        return [name for _, name in sorted(scores)[:k]]
@@ -0,0 +1,11 @@
+"""
+Unit tests of the helper modules and scripts; run with `python -m pytest scripts/tests`
+
+The scripts import their helpers by plain name (they run from the repo root as
+`python scripts/<name>.py`), so scripts/ is put on the path here.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,69 @@
+import random
+
+from dedup_images import HashBuckets, find_clusters, hamming, representative
+
+
+def flip(value, bits):
+    """value with the given bit positions inverted"""
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def entry(phash, dhash, width=100, height=100):
+    return {'phash': f"{phash:016x}", 'dhash': f"{dhash:016x}", 'width': width, 'height': height}
+
+
+def test_buckets_find_every_hash_within_radius():
+    rng = random.Random(0)
+    radius = 6
+    buckets = HashBuckets(radius)
+    values = [rng.getrandbits(64) for _ in range(200)]
+    # Near copies of the first values, up to radius bits away
+    values += [flip(value, rng.sample(range(64), rng.randint(0, radius))) for value in values[:50]]
+    for i, value in enumerate(values):
+        buckets.add(value, i)
+    for value in values:
+        expected = {i for i, other in enumerate(values) if hamming(value, other) <= radius}
+        assert expected <= buckets.candidates(value)
+
+
+def test_clusters_group_near_duplicates():
+    base = 0x0123456789ABCDEF
+    hashes = {
+        'image_1.png': entry(base, base),
+        'image_2.png': entry(flip(base, range(3)), flip(base, range(2)), width=200),
+        'image_3.png': entry(~base & (2 ** 64 - 1), base),
+    }
+    clusters = find_clusters(hashes, distance=6)
+    # The larger image represents the cluster
+    assert clusters == [['image_2.png', 'image_1.png']]
+    assert representative(clusters[0], hashes) == 'image_2.png'
+
+
+def test_both_hashes_must_match():
+    base = 0x0123456789ABCDEF
+    hashes = {
+        'image_1.png': entry(base, base),
+        'image_2.png': entry(base, flip(base, range(10))),
+    }
+    assert find_clusters(hashes, distance=6) == []
+
+
+def test_clusters_do_not_chain():
+    # A~B and B~C are 6 bits apart, A and C are 12: C is not a duplicate of A
+    base = 0x0123456789ABCDEF
+    a = base
+    b = flip(base, range(6))
+    c = flip(base, range(12))
+    hashes = {
+        'image_1.png': entry(a, a),
+        'image_2.png': entry(b, b),
+        'image_3.png': entry(c, c),
+    }
+    clusters = find_clusters(hashes, distance=6)
+    assert clusters == [['image_1.png', 'image_2.png']]
+    for cluster in clusters:
+        keep = cluster[0]
+        for file in cluster[1:]:
+            assert hamming(int(hashes[keep]['phash'], 16), int(hashes[file]['phash'], 16)) <= 6
@@ -0,0 +1,41 @@
+import os
+import json
+import pickle
+
+import pytest
+
+import file_utils
+from file_utils import WorkerTask, write_json_atomic
+
+
+def test_write_json_atomic_replaces_the_file(tmp_path):
+    path = str(tmp_path / 'data.json')
+    write_json_atomic(path, {'a': 1})
+    write_json_atomic(path, {'b': 2}, sort_keys=True)
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'b': 2}
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+def test_written_files_get_the_umask_permissions(tmp_path):
+    path = str(tmp_path / 'data.json')
+    write_json_atomic(path, [])
+    assert os.stat(path).st_mode & 0o777 == file_utils.FILE_MODE
+
+
+def test_failed_writes_leave_the_old_file(tmp_path):
+    path = str(tmp_path / 'data.json')
+    write_json_atomic(path, [1])
+    with pytest.raises(TypeError):
+        write_json_atomic(path, {'not serializable': object()})
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == [1]
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+def test_worker_task_reports_errors_and_pickles():
+    task = pickle.loads(pickle.dumps(WorkerTask(int)))
+    assert task(('a', '12')) == ('a', 12, None)
+    key, result, error = task(('b', 'twelve'))
+    assert (key, result) == ('b', None)
+    assert 'twelve' in error
@@ -0,0 +1,120 @@
+import gzip
+import json
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from http_cassette import RECORD, REPLAY, Cassette, CassetteMiss
+
+
+class StubAdapter(BaseAdapter):
+    """Answers every request with the next queued (status, body, headers) and counts the calls"""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append(request)
+        status, body, headers = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def session_with(adapter):
+    session = requests.Session()
+    session.mount('https://', adapter)
+    return session
+
+
+def test_recorded_responses_replay_in_order_without_the_network(tmp_path):
+    path = str(tmp_path / 'cassette.json.gz')
+    stub = StubAdapter([
+        (200, b'{"page": 1}', {'ETag': '"a"', 'X-RateLimit-Remaining': '10', 'Content-Type': 'application/json'}),
+        (200, b'{"page": 2}', {'ETag': '"b"'}),
+        (200, b'\x89PNG\x00', {'Content-Type': 'image/png'}),
+    ])
+    session = session_with(stub)
+    cassette = Cassette(path, RECORD)
+    cassette.mount(session)
+    session.get('https://api.github.com/users/a/repos', params={'page': 1, 'per_page': 100},
+                headers={'Authorization': 'token secret'})
+    session.get('https://api.github.com/users/a/repos', params={'per_page': 100, 'page': 1})
+    session.get('https://example.com/image.png')
+    cassette.meta['graphql'] = False
+    cassette.save()
+
+    offline = StubAdapter([])
+    session = session_with(offline)
+    replay = Cassette(path, REPLAY)
+    replay.mount(session)
+    # Query parameters are matched in any order
+    first = session.get('https://api.github.com/users/a/repos?per_page=100&page=1')
+    second = session.get('https://api.github.com/users/a/repos', params={'page': 1, 'per_page': 100})
+    image = session.get('https://example.com/image.png')
+    assert first.json() == {'page': 1} and first.headers['ETag'] == '"a"'
+    assert second.json() == {'page': 2}
+    assert image.content == b'\x89PNG\x00'
+    # Rate limit headers are not kept, so replays are never paused
+    assert 'X-RateLimit-Remaining' not in first.headers
+    assert offline.sent == []
+    assert replay.meta['graphql'] is False
+    replay.check()
+
+
+def test_credentials_are_not_stored(tmp_path):
+    path = tmp_path / 'cassette.json.gz'
+    session = session_with(StubAdapter([(200, b'{}', {})]))
+    cassette = Cassette(str(path), RECORD)
+    cassette.mount(session)
+    session.get('https://api.github.com/user', headers={'Authorization': 'token secret'})
+    cassette.save()
+    assert b'secret' not in gzip.decompress(path.read_bytes())
+
+
+def test_posts_are_matched_on_their_body(tmp_path):
+    path = str(tmp_path / 'cassette.json.gz')
+    session = session_with(StubAdapter([(200, b'"one"', {}), (200, b'"two"', {})]))
+    cassette = Cassette(path, RECORD)
+    cassette.mount(session)
+    session.post('https://openrouter.ai/api/v1/chat/completions', json={'prompt': 'one'})
+    session.post('https://openrouter.ai/api/v1/chat/completions', json={'prompt': 'two'})
+    cassette.save()
+
+    session = session_with(StubAdapter([]))
+    replay = Cassette(path, REPLAY)
+    replay.mount(session)
+    assert session.post('https://openrouter.ai/api/v1/chat/completions', json={'prompt': 'two'}).json() == 'two'
+    assert session.post('https://openrouter.ai/api/v1/chat/completions', json={'prompt': 'one'}).json() == 'one'
+
+
+def test_misses_get_a_404_and_fail_the_check(tmp_path):
+    path = str(tmp_path / 'cassette.json.gz')
+    session = session_with(StubAdapter([(503, b'{}', {}), (200, b'{}', {})]))
+    cassette = Cassette(path, RECORD)
+    cassette.mount(session)
+    # 5xx responses are not recorded
+    session.get('https://api.github.com/a')
+    session.get('https://api.github.com/b')
+    cassette.save()
+
+    session = session_with(StubAdapter([]))
+    replay = Cassette(path, REPLAY)
+    replay.mount(session)
+    assert session.get('https://api.github.com/b').status_code == 200
+    replay.check()
+    response = session.get('https://api.github.com/a')
+    assert response.status_code == 404
+    assert json.loads(response.content) == {'message': 'Not in cassette'}
+    with pytest.raises(CassetteMiss):
+        replay.check()
@@ -0,0 +1,108 @@
+import pytest
+
+import project_cache
+from project_cache import ProjectCache
+
+NAMESPACES = [('repos_', 'repos'), ('readme_', 'readme'), ('state_', 'state')]
+TTLS = {'repos': 100, 'readme': 1000, 'state': None}
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(project_cache.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ProjectCache(str(tmp_path / 'cache.db'), NAMESPACES, TTLS, default_ttl=50)
+    yield cache
+    cache.close()
+
+
+def test_entries_expire_with_the_ttl_of_their_namespace(cache, clock):
+    cache.set('repos_user', [1])
+    cache.set('readme_user_repo', 'text')
+    cache.set('other', 'value')
+    clock.now += 99
+    assert cache.get('repos_user') == [1]
+    clock.now += 2
+    assert cache.get('repos_user') is None
+    assert cache.get('readme_user_repo') == 'text'
+    # Keys matching no prefix use the default TTL
+    assert cache.get('other') is None
+
+
+def test_entries_without_ttl_never_expire(cache, clock):
+    cache.set('state_user/repo', {'sha': 'abc'})
+    clock.now += 10 ** 9
+    assert cache.get('state_user/repo') == {'sha': 'abc'}
+
+
+def test_expired_entries_keep_their_validators(cache, clock):
+    cache.set('repos_user', [1], etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+    clock.now += 200
+    entry = cache.get_entry('repos_user')
+    assert entry['fresh'] is False
+    assert entry['value'] == [1]
+    assert entry['etag'] == '"v1"'
+    assert entry['last_modified'] == 'Mon, 01 Jan 2024 00:00:00 GMT'
+
+
+def test_touch_restarts_the_ttl_and_keeps_the_validators(cache, clock):
+    cache.set('repos_user', [1], etag='"v1"')
+    clock.now += 200
+    cache.touch('repos_user')
+    assert cache.get('repos_user') == [1]
+    assert cache.get_entry('repos_user')['etag'] == '"v1"'
+
+
+def test_fingerprint_mismatch_is_a_miss(cache):
+    cache.set('readme_user_repo', 'summary', fingerprint='hash-1')
+    assert cache.get('readme_user_repo', 'hash-1') == 'summary'
+    assert cache.get('readme_user_repo', 'hash-2') is None
+    # Without a fingerprint the entry is returned as it is
+    assert cache.get('readme_user_repo') == 'summary'
+
+
+def test_hits_return_independent_copies(cache):
+    cache.set('repos_user', {'items': [1]})
+    cache.get('repos_user')['items'].append(2)
+    assert cache.get('repos_user') == {'items': [1]}
+
+
+def test_flushed_entries_survive_a_reopen(tmp_path, clock):
+    path = str(tmp_path / 'cache.db')
+    cache = ProjectCache(path, NAMESPACES, TTLS, default_ttl=50)
+    cache.set('readme_user_repo', 'text', etag='"v1"')
+    cache.flush()
+    cache.close()
+    cache = ProjectCache(path, NAMESPACES, TTLS, default_ttl=50)
+    try:
+        assert cache.get('readme_user_repo') == 'text'
+        assert cache.get_entry('readme_user_repo')['etag'] == '"v1"'
+    finally:
+        cache.close()
+
+
+def test_evict_keeps_expired_entries_with_validators_for_stale_ttl(cache, clock):
+    cache.set('repos_plain', [1])
+    cache.set('repos_validated', [2], etag='"v1"')
+    cache.set('state_user/repo', {})
+    clock.now += 200
+    assert cache.evict() == 1
+    assert cache.get_entry('repos_plain') is None
+    assert cache.get_entry('repos_validated') is not None
+    clock.now += cache.stale_ttl
+    assert cache.evict() == 1
+    assert cache.get_entry('repos_validated') is None
+    assert cache.get('state_user/repo') == {}
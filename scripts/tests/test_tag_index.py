@@ -0,0 +1,49 @@
+from tag_index import TagIndex, tag_key
+
+
+def test_keys_ignore_case_spaces_dots_and_dashes():
+    assert tag_key('Node.js') == tag_key('nodejs') == tag_key(' Node JS ') == tag_key('node-js')
+
+
+def test_canonical_uses_known_spellings_and_aliases():
+    index = TagIndex(['JavaScript', 'Node.js'], [['FastAPI']])
+    assert index.canonical('JS') == 'JavaScript'
+    assert index.canonical('javascript') == 'JavaScript'
+    assert index.canonical('node js') == 'Node.js'
+    assert index.canonical('cpp') == 'C++'
+    assert index.canonical('fastapi') == 'FastAPI'
+    # New tags are kept as they are, stripped
+    assert index.canonical('  Brand New  ') == 'Brand New'
+
+
+def test_icon_names_win_over_project_spellings():
+    index = TagIndex(['PyTorch'], [['pytorch'], ['Pytorch']])
+    assert index.canonical('PYTORCH') == 'PyTorch'
+    assert index.counts['PyTorch'] == 2
+
+
+def test_canonicalize_removes_duplicates_and_keeps_the_order():
+    index = TagIndex(['TypeScript', 'React'])
+    assert index.canonicalize(['ts', 'React', 'TypeScript', 'reactjs', 'Vite']) == ['TypeScript', 'React', 'Vite']
+
+
+def test_added_tags_become_known():
+    index = TagIndex()
+    index.add(['LangChain'])
+    assert index.canonical('langchain') == 'LangChain'
+    assert index.counts['LangChain'] == 1
+
+
+def test_candidates_rank_mentions_and_the_language_first():
+    index = TagIndex(['Python', 'React', 'Docker', 'Go', 'Rust'])
+    text = "A Docker image for a React front end. Built with docker compose, go read the docs."
+    candidates = index.candidates('Python', text, 3)
+    assert candidates[0] == 'Python'
+    assert set(candidates[1:]) == {'Docker', 'React'}
+    # Short tags only match as written, "go" is a common word
+    assert 'Go' not in index.candidates(None, text, 10)[:3]
+
+
+def test_candidates_are_deterministic():
+    index = TagIndex(['B', 'A', 'C', 'Delta', 'Alpha'])
+    assert index.candidates(None, '', 5) == index.candidates(None, '', 5) == sorted(index.candidates(None, '', 5))
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import project_cache
+import update_projects
+from fake_services import FakeServices, mount
+
+
+@pytest.fixture
+def github(tmp_path, monkeypatch):
+    """update_projects with a fresh cache and scheduler, talking to the fake GitHub"""
+    services = FakeServices(repo_count=3, latency=0).start()
+    monkeypatch.setattr(update_projects, 'CACHE_DB', str(tmp_path / 'cache.db'))
+    monkeypatch.setattr(update_projects, 'GITHUB_TOKEN', None)
+    monkeypatch.setattr(update_projects, 'GITHUB_RATE', (1000, 1000))
+    for name in ('_cache', '_scheduler', '_tracer'):
+        monkeypatch.setattr(update_projects, name, None)
+    mount(update_projects.get_scheduler().session, services)
+    services.reset_counts()
+    yield services
+    update_projects.get_cache().close()
+    services.stop()
+
+
+def repo_url(services):
+    return f"https://api.github.com/repos/{services.username}/project-0"
+
+
+def test_fresh_entries_are_served_without_a_request(github):
+    value, response = update_projects.github_get(repo_url(github), 'repo_test')
+    assert response.status_code == 200
+    cached, response = update_projects.github_get(repo_url(github), 'repo_test')
+    assert cached == value
+    assert response is None
+    assert github.counts['github'] == 1
+
+
+def test_expired_entries_are_revalidated_with_their_etag(github, monkeypatch):
+    value, _ = update_projects.github_get(repo_url(github), 'repo_test')
+    assert update_projects.get_cache().get_entry('repo_test')['etag']
+
+    now = project_cache.time.time() + 10 ** 7
+    monkeypatch.setattr(project_cache.time, 'time', lambda: now)
+    assert update_projects.get_cache().get_entry('repo_test')['fresh'] is False
+    revalidated, response = update_projects.github_get(repo_url(github), 'repo_test')
+    assert response.status_code == 304
+    assert revalidated == value
+    assert github.counts == {'github': 2, 'openrouter': 0, 'not_modified': 1}
+    # The 304 restarted the TTL
+    assert update_projects.get_cache().get_entry('repo_test')['fresh'] is True
+
+
+def test_changed_resources_replace_the_entry(github):
+    update_projects.github_get(repo_url(github), 'repo_test')
+    github.repos[0]['stargazers_count'] = 1000
+    value, response = update_projects.github_get(repo_url(github), 'repo_test', revalidate=True)
+    assert response.status_code == 200
+    assert value['stargazers_count'] == 1000
+    assert update_projects.get_from_cache('repo_test')['stargazers_count'] == 1000
+
+
+def test_failed_requests_are_not_cached(github):
+    url = f"https://api.github.com/repos/{github.username}/missing"
+    value, response = update_projects.github_get(url, 'repo_missing')
+    assert value is None
+    assert response.status_code == 404
+    assert update_projects.get_cache().get_entry('repo_missing') is None
+
+
+def test_project_slugs_are_stable_and_unambiguous():
+    project = {'id': 3, 'githubUrl': 'https://github.com/WiredMind2/Awale-Game'}
+    assert update_projects.project_slug(project) == 'wiredmind2--awale-game'
+    assert update_projects.project_slug(dict(project, id=7)) == 'wiredmind2--awale-game'
+    assert update_projects.project_slug({'id': 3}) == 'project-3'
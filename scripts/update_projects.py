@@ -6,12 +6,26 @@ Automatically fetches GitHub repos and updates the portfolio projects
 
 import os
 import sys
-import requests
 import json
-import sqlite3
 import time
-from datetime import datetime
+import base64
+import hashlib
+import copy
+import heapq
+import atexit
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
+from file_utils import write_json_atomic
+from http_cassette import RECORD, REPLAY, Cassette, CassetteMiss
+from project_cache import ProjectCache
+from rate_limit import HIGH, NORMAL, RequestScheduler, TokenBucket
+from run_trace import Tracer
+from tag_index import TagIndex
 
 load_dotenv()
 
@@ -19,85 +33,295 @@ OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 # OPENROUTER_MODEL = "tngtech/deepseek-r1t2-chimera:free"  # Change this to your preferred model
 OPENROUTER_MODEL = "tngtech/deepseek-r1t2-chimera:free"
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 
 # Cache settings
 CACHE_DB = "cache.db"
-CACHE_TTL = 86400  # 24 hours
+CACHE_TTL = 86400  # 24 hours, for keys outside the namespaces below
+# Key prefix -> namespace
+CACHE_NAMESPACES = [
+    ('repos_', 'repos'),
+    ('repo_', 'repos'),
+    ('contributed_search_', 'repos'),
+    ('pinned_', 'repos'),
+    ('graphql_repos_', 'repos'),
+    ('head_', 'head'),
+    ('state_', 'state'),
+    ('readme_', 'readme'),
+    ('desc_', 'llm'),
+    ('long_desc_', 'llm'),
+    ('tags_', 'llm'),
+    ('meta_', 'llm'),
+]
+CACHE_TTLS = {
+    'repos': 86400,  # 24 hours, then revalidated with the stored ETag
+    'readme': 86400,  # 24 hours, then revalidated with the stored ETag
+    'llm': None,  # Never expires, invalidated when the README hash changes
+    'head': 0,  # Default-branch SHAs are always revalidated (a 304 is free)
+    'state': None,  # Inputs of the last enrichment of each repo, see --incremental
+}
 MAX_REPOS = 70
+PUSH_CLOCK_MARGIN = 300  # Seconds a cached README must postdate a push by to be trusted, covers clock skew
+TAG_CANDIDATES = 15  # Known tags offered in each tag prompt, most relevant first
+
+# Concurrency settings
+GITHUB_WORKERS = 4  # Parallel GitHub API requests
+LLM_WORKERS = 4  # Parallel OpenRouter requests
+
+# Rate limits: (requests per second, burst), corrected at runtime from the response headers
+GITHUB_RATE = (10, 20)  # Stays clear of GitHub's secondary limits
+GITHUB_GRAPHQL_RATE = (2, 5)  # GraphQL queries are costlier and have their own quota
+GITHUB_SEARCH_RATE = (30 / 60, 5)  # The search API has its own quota of 30 requests per minute
+OPENROUTER_RATE = (20 / 60, 5)  # Free models allow 20 requests per minute
+
+# Daemon settings (--daemon)
+EVENT_TYPES = ('PushEvent', 'CreateEvent', 'PullRequestEvent')  # Events that trigger a re-enrichment
+DEFAULT_POLL_INTERVAL = 60  # Seconds, used until GitHub sends X-Poll-Interval
+DAEMON_DEBOUNCE = 30  # Seconds without new events before projects.json is rewritten
+DAEMON_MAX_BACKOFF = 900  # Seconds, longest wait after repeated failed iterations
+
+# Inputs and outputs, moved under REPLAY_DIR by --replay
+PROJECTS_PATH = 'src/projects.json'
+TECH_ICONS_PATH = 'src/techIcons.json'
+
+# Front-end payload split out of projects.json
+PROJECTS_INDEX = 'src/projects.index.json'  # Bundled: what the project cards need
+PROJECT_DETAILS_DIR = 'public/project_details'  # One {id}.json per project, fetched by the modal
+INDEX_FIELDS = ('id', 'title', 'description', 'techStack', 'featured', 'category', 'githubUrl', 'liveUrl')
+
+# Run report (--report, --trace)
+REPORT_PATH = 'update_report.json'  # Totals per phase, repo and counter, plus every span
+TRACE_PATH = 'update_trace.json'  # Chrome trace format, for chrome://tracing or Perfetto
+
+# Record/replay (--record, --replay)
+CASSETTE_PATH = 'update_cassette.json.gz'
+REPLAY_DIR = 'replay_output'  # Replays write here instead of src/ and public/
+REPLAY_RATE = (1e6, 1e6)  # Replayed responses cost nothing, requests never wait for tokens
+
+_cache = None
+_scheduler = None
+_tracer = None
+_cassette = None
+
+def get_cache():
+    """Return the shared cache, opening it on first use"""
+    global _cache
+    if _cache is None:
+        _cache = ProjectCache(CACHE_DB, CACHE_NAMESPACES, CACHE_TTLS, CACHE_TTL)
+        atexit.register(_cache.close)
+    return _cache
+
+def get_scheduler():
+    """Return the shared request scheduler, with one token bucket per API"""
+    global _scheduler
+    if _scheduler is None:
+        replaying = _cassette is not None and _cassette.mode == REPLAY
+        _scheduler = RequestScheduler({
+            # A few tokens are kept for cheap revalidation requests
+            'github': TokenBucket(*(REPLAY_RATE if replaying else GITHUB_RATE), reserve=2, max_concurrency=GITHUB_WORKERS),
+            'github_graphql': TokenBucket(*(REPLAY_RATE if replaying else GITHUB_GRAPHQL_RATE), max_concurrency=1),
+            # Search responses carry the search quota in their headers, it must not throttle the core bucket
+            'github_search': TokenBucket(*(REPLAY_RATE if replaying else GITHUB_SEARCH_RATE), max_concurrency=1),
+            'openrouter': TokenBucket(*(REPLAY_RATE if replaying else OPENROUTER_RATE), max_concurrency=LLM_WORKERS),
+        }, pool_size=max(GITHUB_WORKERS, LLM_WORKERS))
+        if _cassette is not None:
+            _cassette.mount(_scheduler.session)
+    return _scheduler
+
+def start_cassette(mode):
+    """Record every request of the run to CASSETTE_PATH, or replay them from it without network access
+
+    Must be called before the cache and the scheduler are opened. Both modes use an empty
+    in-memory cache so a replay makes exactly the requests of the recording, whatever
+    cache.db holds. A replay takes the GraphQL or REST path the recording took.
+
+    The recording also stores projects.json and techIcons.json as they were before the
+    run, since the prompts are built from them. A replay starts from those copies in
+    REPLAY_DIR and writes its outputs there, leaving src/ and public/ alone.
+    """
+    global _cassette, CACHE_DB, GITHUB_TOKEN
+    global PROJECTS_PATH, TECH_ICONS_PATH, PROJECTS_INDEX, PROJECT_DETAILS_DIR
+    _cassette = Cassette(CASSETTE_PATH, mode)
+    CACHE_DB = ':memory:'
+    inputs = {'projects': PROJECTS_PATH, 'tech_icons': TECH_ICONS_PATH}
+    if mode == RECORD:
+        _cassette.meta['graphql'] = bool(GITHUB_TOKEN)
+        _cassette.meta['inputs'] = {}
+        for name, path in inputs.items():
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    _cassette.meta['inputs'][name] = f.read()
+        return
+
+    # The token is never sent during a replay, it only selects the code path
+    GITHUB_TOKEN = 'replay' if _cassette.meta.get('graphql') else None
+    shutil.rmtree(REPLAY_DIR, ignore_errors=True)
+    PROJECTS_PATH, TECH_ICONS_PATH, PROJECTS_INDEX, PROJECT_DETAILS_DIR = (
+        os.path.join(REPLAY_DIR, path) for path in (PROJECTS_PATH, TECH_ICONS_PATH, PROJECTS_INDEX, PROJECT_DETAILS_DIR))
+    os.makedirs(os.path.dirname(PROJECTS_PATH), exist_ok=True)
+    for name, path in {'projects': PROJECTS_PATH, 'tech_icons': TECH_ICONS_PATH}.items():
+        text = _cassette.meta.get('inputs', {}).get(name)
+        if text is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+def finish_cassette():
+    if _cassette.mode == RECORD:
+        _cassette.save()
+        count = sum(len(entries) for entries in _cassette.interactions.values())
+        print(f"Recorded {count} responses to {CASSETTE_PATH}")
+    elif _cassette.misses:
+        print(f"{len(_cassette.misses)} requests were not in {CASSETTE_PATH}, record it again")
+    else:
+        print(f"Replayed every request from {CASSETTE_PATH}, outputs are in {REPLAY_DIR}")
+
+def check_cassette():
+    """Stop a replay that missed requests before it writes anything"""
+    if _cassette is not None and _cassette.mode == REPLAY:
+        _cassette.check()
+
+def get_tracer():
+    """Return the shared span/counter recorder of the run"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+def traced(name):
+    """Run every call of a function taking the repo as first argument inside a span"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(repo, *args, **kwargs):
+            with get_tracer().span(name, repo=repo['full_name']):
+                return func(repo, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def count_cache(key, result):
+    """Count a cache outcome (hit, miss, revalidated) under the namespace of its key"""
+    get_tracer().count(f"cache.{get_cache().namespace_of(key)}.{result}")
+
+def count_response(api, response):
+    """Count a response by status and add its body size"""
+    tracer = get_tracer()
+    tracer.count(f"http.{api}.{response.status_code}")
+    tracer.count(f"http.{api}.bytes", len(response.content))
 
 def init_db():
-    """Initialize the SQLite cache database"""
-    conn = sqlite3.connect(CACHE_DB)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS cache
-                 (key TEXT PRIMARY KEY, value TEXT, timestamp REAL)''')
-    conn.commit()
-    conn.close()
-
-def get_from_cache(key):
-    """Retrieve value from cache if it exists and hasn't expired"""
-    try:
-        conn = sqlite3.connect(CACHE_DB)
-        c = conn.cursor()
-        c.execute("SELECT value, timestamp FROM cache WHERE key=?", (key,))
-        row = c.fetchone()
-        conn.close()
-        
-        if row:
-            value, timestamp = row
-            if time.time() - timestamp < CACHE_TTL:
-                return json.loads(value)
-    except Exception as e:
-        print(f"Cache read error: {e}")
-    return None
+    """Initialize the SQLite cache database and drop expired entries"""
+    removed = get_cache().evict(vacuum="--vacuum" in sys.argv)
+    if removed:
+        print(f"Evicted {removed} expired cache entries")
+
+def get_from_cache(key, fingerprint=None):
+    """Retrieve value from cache if it exists, hasn't expired and matches the fingerprint"""
+    with get_tracer().span('cache_get', key=key) as span:
+        try:
+            value = get_cache().get(key, fingerprint)
+        except Exception as e:
+            print(f"Cache read error: {e}")
+            value = None
+        span['hit'] = value is not None
+        count_cache(key, 'hit' if value is not None else 'miss')
+        return value
 
-def save_to_cache(key, value):
+def save_to_cache(key, value, fingerprint=None):
     """Save value to cache with current timestamp"""
-    try:
-        conn = sqlite3.connect(CACHE_DB)
-        c = conn.cursor()
-        c.execute("INSERT OR REPLACE INTO cache (key, value, timestamp) VALUES (?, ?, ?)",
-                  (key, json.dumps(value), time.time()))
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Cache write error: {e}")
+    with get_tracer().span('cache_set', key=key):
+        try:
+            get_cache().set(key, value, fingerprint=fingerprint)
+        except Exception as e:
+            print(f"Cache write error: {e}")
 
 
-def fetch_github_repos(username):
-    """Fetch public repositories from GitHub API"""
-    cache_key = f"repos_{username}"
-    cached = get_from_cache(cache_key)
-    if cached:
-        print(f"Using cached repos for {username}")
-        return cached
+def github_get(url, cache_key, params=None, transform=None, revalidate=False, api='github'):
+    """GET a GitHub REST resource through the cache
+
+    Fresh entries are returned without a request. Expired entries are revalidated with
+    their ETag/Last-Modified, and a 304 (which doesn't count against the rate limit)
+    only restarts their TTL. transform(response) builds the cached value (default: the JSON).
+    revalidate=True treats a fresh entry as expired. api is the scheduler bucket
+    ('github_search' for the search API).
+    Returns (value, response): response is None for a fresh cache hit, and value is
+    None when the request failed.
+    """
+    cache = get_cache()
+    with get_tracer().span('github', key=cache_key) as span:
+        entry = cache.get_entry(cache_key)
+        if entry and entry['fresh'] and not revalidate:
+            span['cache'] = 'hit'
+            count_cache(cache_key, 'hit')
+            return entry['value'], None
+
+        headers = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        # Revalidations are cheap (a 304 doesn't count against the quota), let them go first
+        priority = HIGH if entry else NORMAL
+        response = get_scheduler().request(api, 'GET', url, priority=priority, params=params, headers=headers, timeout=30)
+        span['status'] = response.status_code
+        span['bytes'] = len(response.content)
+        count_response(api, response)
+        if response.status_code == 304 and entry:
+            span['cache'] = 'revalidated'
+            count_cache(cache_key, 'revalidated')
+            cache.touch(cache_key)
+            return entry['value'], response
+        span['cache'] = 'miss'
+        count_cache(cache_key, 'miss')
+        if response.status_code == 200:
+            value = transform(response) if transform else response.json()
+            cache.set(cache_key, value, etag=response.headers.get('ETag'),
+                      last_modified=response.headers.get('Last-Modified'))
+            return value, response
+        return None, response
+
+def iter_github_pages(url, cache_key, params=None, items_key=None, api='github', revalidate=False):
+    """Lazily yield the items of a paginated GitHub REST listing, following Link rel="next" headers
 
+    Every page is cached and revalidated on its own together with its next link, so a
+    consumer that stops early never requests the later pages. items_key selects the
+    list inside an object response (e.g. 'items' for search results). revalidate=True
+    revalidates fresh pages too (see github_get).
+    """
+    def page_value(response):
+        data = response.json()
+        return {
+            'items': data[items_key] if items_key else data,
+            'next': response.links.get('next', {}).get('url'),
+        }
+
+    page = 1
+    while url:
+        value, response = github_get(url, f"{cache_key}_page{page}", params=params, transform=page_value,
+                                     revalidate=revalidate, api=api)
+        if value is None:
+            raise Exception(f"GitHub error {response.status_code} on {url}")
+        yield from value['items']
+        # The next link already carries the query string
+        url, params = value['next'], None
+        page += 1
+
+def fetch_github_repos(username, revalidate=False):
+    """Yield public repositories from GitHub API, most recently updated first"""
     url = f"https://api.github.com/users/{username}/repos"
     params = {
         'sort': 'updated',
         'direction': 'desc',
-        'per_page': 30  # Get top 30 most recent
+        'per_page': 100
     }
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
 
-    response = requests.get(url, params=params, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        save_to_cache(cache_key, data)
-        return data
-    else:
-        print(f"Error fetching repos: {response.status_code}")
-        return []
-
-def fetch_contributed_repos(username):
-    """Fetch repositories the user has contributed to (via PRs) excluding their own"""
-    cache_key = f"contributed_repos_{username}"
-    cached = get_from_cache(cache_key)
-    if cached:
-        print(f"Using cached contributed repos for {username}")
-        return cached
+    try:
+        yield from iter_github_pages(url, f"repos_{username}", params=params, revalidate=revalidate)
+    except Exception as e:
+        print(f"Error fetching repos: {e}")
 
+def fetch_contributed_repos(username, revalidate=False):
+    """Yield repositories the user has contributed to (via PRs) excluding their own"""
     print(f"Searching for contributed repositories for {username}...")
     url = "https://api.github.com/search/issues"
     # Search for PRs authored by user, excluding user's own repos
@@ -107,190 +331,282 @@ def fetch_contributed_repos(username):
         'q': query,
         'sort': 'updated',
         'order': 'desc',
-        'per_page': 50  # Check last 50 PRs to find repositories
+        'per_page': 100
     }
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
 
+    seen = set()
     try:
-        response = requests.get(url, params=params, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            items = data.get('items', [])
-            
-            repo_urls = set()
-            for item in items:
-                # The search result provides the repository API URL
-                repo_urls.add(item['repository_url'])
-            
-            repos = []
-            print(f"Found {len(repo_urls)} external repositories with contributions")
-            
-            for r_url in repo_urls:
-                try:
-                    # Fetch repo details needed for the portfolio
-                    r_res = requests.get(r_url, headers=headers)
-                    if r_res.status_code == 200:
-                        repo_data = r_res.json()
-                        # Only include if public
-                        if not repo_data.get('private', False):
-                            repos.append(repo_data)
-                    else:
-                        print(f"Failed to fetch repo details for {r_url}: {r_res.status_code}")
-                except Exception as e:
-                    print(f"Error fetching repo {r_url}: {e}")
-            
-            save_to_cache(cache_key, repos)
-            return repos
-        else:
-            print(f"Error searching contributed repos: {response.status_code} - {response.text}")
-            return []
+        for item in iter_github_pages(url, f"contributed_search_{username}", params=params, items_key='items',
+                                      api='github_search', revalidate=revalidate):
+            # The search result provides the repository API URL
+            r_url = item['repository_url']
+            if r_url in seen:
+                continue
+            seen.add(r_url)
+            try:
+                # Fetch repo details needed for the portfolio
+                owner, name = r_url.rstrip('/').split('/')[-2:]
+                repo_data, r_res = github_get(r_url, f"repo_{owner}_{name}", revalidate=revalidate)
+                if repo_data is not None:
+                    # Only include if public
+                    if not repo_data.get('private', False):
+                        yield repo_data
+                else:
+                    print(f"Failed to fetch repo details for {r_url}: {r_res.status_code}")
+            except Exception as e:
+                print(f"Error fetching repo {r_url}: {e}")
     except Exception as e:
         print(f"Error in fetch_contributed_repos: {e}")
-        return []
 
-def fetch_readme(owner, repo):
+def fetch_readme(owner, repo, revalidate=False):
     """Fetch README content from GitHub API"""
-    cache_key = f"readme_{owner}_{repo}"
-    cached = get_from_cache(cache_key)
-    if cached:
-        return cached
-
     url = f"https://api.github.com/repos/{owner}/{repo}/readme"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        import base64
-        content = base64.b64decode(data['content']).decode('utf-8')
-        save_to_cache(cache_key, content)
+    with get_tracer().span('fetch_readme', repo=f"{owner}/{repo}"):
+        content, response = github_get(url, f"readme_{owner}_{repo}",
+                                       transform=lambda response: base64.b64decode(response.json()['content']).decode('utf-8'),
+                                       revalidate=revalidate)
+    if content is not None:
         return content
     else:
         print(f"Error fetching README for {owner}/{repo}: {response.status_code}")
         raise FileNotFoundError
 
+def default_branch_sha(repo):
+    """Head commit of the repo's default branch, or None if it can't be found"""
+    if repo.get('default_branch_sha'):
+        return repo['default_branch_sha']
+    if not repo.get('default_branch'):
+        return None
+    owner, name = repo['owner']['login'], repo['name']
+    url = f"https://api.github.com/repos/{owner}/{name}/commits/{repo['default_branch']}"
+    sha, _ = github_get(url, f"head_{owner}_{name}", transform=lambda response: response.json()['sha'])
+    return sha
+
+def readme_fingerprint(readme):
+    """Hash of the README an LLM output was generated from"""
+    return hashlib.sha256(readme.encode('utf-8')).hexdigest()
+
+class OpenRouterError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"OpenRouter API error {status_code}")
+        self.status_code = status_code
+
+def call_openrouter(prompt, **options):
+    """Send a single-message chat completion to OpenRouter and return the reply text"""
+    headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}"}
+    with get_tracer().span('openrouter', prompt_chars=len(prompt)) as span:
+        response = get_scheduler().request('openrouter', 'POST', OPENROUTER_URL, json={
+            'model': OPENROUTER_MODEL,
+            'messages': [{'role': 'user', 'content': prompt}],
+            **options
+        }, headers=headers, timeout=30)
+        span['status'] = response.status_code
+        span['bytes'] = len(response.content)
+        count_response('openrouter', response)
+        if response.status_code != 200:
+            print(f"OpenRouter error: {response.status_code} - {response.text}")
+            raise OpenRouterError(response.status_code)
+        result = response.json()
+        tokens = (result.get('usage') or {}).get('total_tokens')
+        if tokens:
+            span['tokens'] = tokens
+            get_tracer().count('openrouter.tokens', tokens)
+        return result['choices'][0]['message']['content'].strip()
+
+def strip_quotes(text):
+    """Remove quotes the model sometimes wraps around its answer"""
+    if text and text[0] == text[-1] and text[0] in ["'", '"']:
+        return text[1:-1]
+    return text
+
+def clean_tags(repo, tags):
+    """Strip and drop empty tags, making sure the repo's main language comes first"""
+    tags = [tag.strip() for tag in tags if tag.strip()]
+    # Ensure the main language is included
+    if repo['language'] and repo['language'] not in tags:
+        tags.insert(0, repo['language'])
+    return tags
+
+@traced('generate_description')
 def generate_description(repo):
     """Generate a description for the repo using OpenRouter"""
+    readme = fetch_readme(repo['owner']['login'], repo['name'])
+    fingerprint = readme_fingerprint(readme)
+
     cache_key = f"desc_{repo['name']}"
-    cached = get_from_cache(cache_key)
+    cached = get_from_cache(cache_key, fingerprint)
     if cached:
         return cached
 
-    readme = fetch_readme(repo['owner']['login'], repo['name'])
-
     try:
         prompt = f"Generate a very concise one-sentence description for the GitHub repository '{repo['name']}' written in {repo['language'] or 'various languages'}. Original description: {repo.get('description', 'No description provided')}. README content: {readme[:500]}. Output only the description text, without any introductory phrases or additional commentary."
-        headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}"}
-        response = requests.post(OPENROUTER_URL, json={
-            'model': OPENROUTER_MODEL,
-            'messages': [{'role': 'user', 'content': prompt}]
-        }, headers=headers, timeout=30)
-        if response.status_code == 200:
-            result = response.json()
-            desc = result['choices'][0]['message']['content'].strip()
-            if desc:
-                if desc[0] == desc[-1] and desc[0] in ["'", '"']:
-                    # Remove quotes
-                    desc = desc[1:-1]
-                save_to_cache(cache_key, desc)
-                return 
-        else:
-            print(f"OpenRouter error: {response.status_code} - {response.text}")
-            raise Exception("OpenRouter API error")
+        desc = strip_quotes(call_openrouter(prompt))
+        if desc:
+            save_to_cache(cache_key, desc, fingerprint)
+            return desc
     except Exception as e:
         print(f"Error generating description with OpenRouter: {e}")
         raise
 
     raise Exception("Failed to generate description")
 
+@traced('generate_long_description')
 def generate_long_description(repo):
     """Generate a longer description using OpenRouter"""
+    readme = fetch_readme(repo['owner']['login'], repo['name'])
+    fingerprint = readme_fingerprint(readme)
+
     cache_key = f"long_desc_{repo['name']}"
-    cached = get_from_cache(cache_key)
+    cached = get_from_cache(cache_key, fingerprint)
     if cached:
         return cached
 
-    readme = fetch_readme(repo['owner']['login'], repo['name'])
-
     try:
         prompt = f"Generate a detailed description (2-3 sentences) for a GitHub repository named '{repo['name']}' written in {repo['language'] or 'various languages'}. Original description: {repo.get('description', 'No description provided')}. README content: {readme[:2000]}. Include key features and purpose. Output only the description text, without any introductory phrases or additional commentary."
-        headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}"}
-        response = requests.post(OPENROUTER_URL, json={
-            'model': OPENROUTER_MODEL,
-            'messages': [{'role': 'user', 'content': prompt}]
-        }, headers=headers, timeout=30)
-        if response.status_code == 200:
-            result = response.json()
-            desc = result['choices'][0]['message']['content'].strip()
-            if desc:
-                if desc[0] == desc[-1] and desc[0] in ["'", '"']:
-                    # Remove quotes
-                    desc = desc[1:-1]
-                save_to_cache(cache_key, desc)
-                return desc
-        else:
-            print(f"OpenRouter error: {response.status_code} - {response.text}")
-            raise Exception("OpenRouter API error")
+        desc = strip_quotes(call_openrouter(prompt))
+        if desc:
+            save_to_cache(cache_key, desc, fingerprint)
+            return desc
     except Exception as e:
         print(f"Error generating long description with OpenRouter: {e}")
         raise
 
     raise Exception("Failed to generate long description")
 
-def get_existing_tags():
-    """Read existing tags from projects.json"""
+def build_tag_index(projects):
+    """Tag index over the tech icon names and the tags of the existing projects"""
+    icon_names = []
     try:
-        if os.path.exists('src/projects.json'):
-            with open('src/projects.json', 'r', encoding='utf-8') as f:
-                projects = json.load(f)
-                tags = set()
-                for project in projects:
-                    if 'techStack' in project:
-                        tags.update(project['techStack'])
-                return list(tags)
+        with open(TECH_ICONS_PATH, 'r', encoding='utf-8') as f:
+            icon_names = [icon['name'] for icon in json.load(f).values()]
     except Exception as e:
-        print(f"Error reading existing tags: {e}")
-    return []
+        print(f"Error reading tech icons: {e}")
+    # 'Various' is the fallback of repos without tags, not a tag worth suggesting
+    return TagIndex(icon_names, [[tag for tag in project.get('techStack', []) if tag != 'Various'] for project in projects])
+
+def candidate_tags(repo, readme, tag_index):
+    """Known tags most relevant to the repo, as a prompt string"""
+    if tag_index is None:
+        return "None"
+    text = f"{repo.get('description') or ''}\n{readme}"
+    return ", ".join(tag_index.candidates(repo['language'], text, TAG_CANDIDATES)) or "None"
 
-def generate_tags(repo, existing_tags=None):
+@traced('generate_tags')
+def generate_tags(repo, tag_index=None):
     """Generate tags for the repo using OpenRouter"""
+    readme = fetch_readme(repo['owner']['login'], repo['name'])
+    fingerprint = readme_fingerprint(readme)
+
     cache_key = f"tags_{repo['name']}"
-    cached = get_from_cache(cache_key)
+    cached = get_from_cache(cache_key, fingerprint)
     if cached:
         return cached
-
-    readme = fetch_readme(repo['owner']['login'], repo['name'])
     
-    existing_tags_str = ", ".join(existing_tags) if existing_tags else "None"
+    existing_tags_str = candidate_tags(repo, readme, tag_index)
 
     try:
         prompt = f"Generate a list of 3-5 technical tags (e.g., React, Python, Machine Learning) for a GitHub repository named '{repo['name']}' written in {repo['language'] or 'various languages'}. README content: {readme[:2000]}. \n\nExisting tags in the system: {existing_tags_str}.\n\nPlease prioritize using existing tags if they are relevant. If the existing tags are not sufficient, create new ones. Output only the tags as a comma-separated list, no other text."
-        headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}"}
-        response = requests.post(OPENROUTER_URL, json={
-            'model': OPENROUTER_MODEL,
-            'messages': [{'role': 'user', 'content': prompt}]
-        }, headers=headers, timeout=30)
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content'].strip()
-            # Clean up and split
-            tags = [tag.strip() for tag in content.split(',') if tag.strip()]
-            # Ensure the main language is included
-            if repo['language'] and repo['language'] not in tags:
-                tags.insert(0, repo['language'])
-            
-            if tags:
-                save_to_cache(cache_key, tags)
-                return tags
-        else:
-            print(f"OpenRouter error: {response.status_code} - {response.text}")
+        content = call_openrouter(prompt)
+        # Clean up and split
+        tags = clean_tags(repo, content.split(','))
+        if tags:
+            save_to_cache(cache_key, tags, fingerprint)
+            return tags
     except Exception as e:
         print(f"Error generating tags with OpenRouter: {e}")
     
     # Fallback
     tags = [repo['language']] if repo['language'] else ['Various']
-    save_to_cache(cache_key, tags)
+    save_to_cache(cache_key, tags, fingerprint)
     return tags
 
+# JSON schema of the single-call structured generation
+METADATA_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'description': {'type': 'string', 'minLength': 1},
+        'long_description': {'type': 'string', 'minLength': 1},
+        'tags': {'type': 'array', 'items': {'type': 'string', 'minLength': 1}, 'minItems': 1, 'maxItems': 8},
+    },
+    'required': ['description', 'long_description', 'tags'],
+    'additionalProperties': False,
+}
+
+def validate_metadata(data):
+    """Check a parsed structured reply against METADATA_SCHEMA, raising ValueError when it doesn't match"""
+    if not isinstance(data, dict):
+        raise ValueError("Metadata is not a JSON object")
+    properties = METADATA_SCHEMA['properties']
+    missing = [key for key in METADATA_SCHEMA['required'] if key not in data]
+    if missing:
+        raise ValueError(f"Metadata is missing {', '.join(missing)}")
+    unexpected = [key for key in data if key not in properties]
+    if unexpected:
+        raise ValueError(f"Metadata has unexpected keys {', '.join(unexpected)}")
+    for key in ('description', 'long_description'):
+        if not isinstance(data[key], str) or not data[key].strip():
+            raise ValueError(f"Metadata {key} must be a non-empty string")
+    tags = data['tags']
+    tags_schema = properties['tags']
+    if not isinstance(tags, list) or not all(isinstance(tag, str) and tag.strip() for tag in tags):
+        raise ValueError("Metadata tags must be a list of non-empty strings")
+    if not tags_schema['minItems'] <= len(tags) <= tags_schema['maxItems']:
+        raise ValueError(f"Metadata has {len(tags)} tags")
+    return data
+
+def parse_metadata(content):
+    """Parse a structured reply, tolerating a Markdown code fence around the JSON"""
+    content = content.strip()
+    if content.startswith('```'):
+        content = content.split('\n', 1)[-1].rsplit('```', 1)[0]
+    return validate_metadata(json.loads(content))
+
+@traced('generate_metadata')
+def generate_metadata(repo, tag_index=None):
+    """Generate the short description, long description and tags in a single OpenRouter call
+
+    Raises ValueError when the reply doesn't match METADATA_SCHEMA, so the caller can
+    fall back to the per-field generators.
+    """
+    readme = fetch_readme(repo['owner']['login'], repo['name'])
+    fingerprint = readme_fingerprint(readme)
+
+    cache_key = f"meta_{repo['name']}"
+    cached = get_from_cache(cache_key, fingerprint)
+    if cached:
+        return cached
+
+    # Reuse results of earlier per-field runs instead of paying for a new call
+    fields = [get_from_cache(f"{prefix}_{repo['name']}", fingerprint) for prefix in ('desc', 'long_desc', 'tags')]
+    if all(fields):
+        return {'description': fields[0], 'long_description': fields[1], 'tags': fields[2]}
+
+    existing_tags_str = candidate_tags(repo, readme, tag_index)
+
+    prompt = (
+        f"Describe the GitHub repository '{repo['name']}' written in {repo['language'] or 'various languages'}. "
+        f"Original description: {repo.get('description', 'No description provided')}. README content: {readme[:2000]}.\n\n"
+        f"Existing tags in the system: {existing_tags_str}.\n\n"
+        "Reply with a JSON object with exactly these keys:\n"
+        "- \"description\": a very concise one-sentence description\n"
+        "- \"long_description\": a detailed description (2-3 sentences) including key features and purpose\n"
+        "- \"tags\": a list of 3-5 technical tags (e.g., React, Python, Machine Learning), prioritizing existing tags if they are relevant\n"
+        "Output only the JSON object, without introductory phrases, commentary or Markdown."
+    )
+    content = call_openrouter(prompt, response_format={
+        'type': 'json_schema',
+        'json_schema': {'name': 'project_metadata', 'strict': True, 'schema': METADATA_SCHEMA}
+    })
+    data = parse_metadata(content)
+
+    metadata = {
+        'description': strip_quotes(data['description'].strip()),
+        'long_description': strip_quotes(data['long_description'].strip()),
+        'tags': clean_tags(repo, data['tags']),
+    }
+    save_to_cache(cache_key, metadata, fingerprint)
+    return metadata
+
 def get_category(language):
     """Map language to category"""
     web_langs = ['JavaScript', 'TypeScript', 'HTML', 'CSS', 'PHP']
@@ -342,7 +658,8 @@ def fetch_pinned_repos(username):
     headers = {"Authorization": f"bearer {GITHUB_TOKEN}"}
     
     try:
-        response = requests.post(url, json={'query': query}, headers=headers)
+        response = get_scheduler().request('github_graphql', 'POST', url, json={'query': query}, headers=headers, timeout=30)
+        count_response('github_graphql', response)
         if response.status_code == 200:
             data = response.json()
             pinned_nodes = data.get('data', {}).get('user', {}).get('pinnedItems', {}).get('nodes', [])
@@ -356,15 +673,296 @@ def fetch_pinned_repos(username):
         print(f"Error fetching pinned repos: {e}")
         return []
 
-def update_projects_json(repos, pinned_repos=[], skip_existing=False):
-    """Update the projects.json file with new projects"""
-    projects = []
+# README locations tried by the bulk GraphQL query, in order
+README_PATHS = ['README.md', 'readme.md', 'Readme.md', 'README.rst', 'README.txt', 'README']
+GRAPHQL_PAGE_SIZE = 50
+
+REPO_FIELDS = """
+  name
+  nameWithOwner
+  url
+  description
+  isFork
+  isPrivate
+  stargazerCount
+  updatedAt
+  pushedAt
+  owner { login }
+  primaryLanguage { name }
+  defaultBranchRef { name target { oid } }
+""" + "".join(
+    f'  readme{i}: object(expression: "HEAD:{path}") {{ ... on Blob {{ text }} }}\n'
+    for i, path in enumerate(README_PATHS)
+)
+
+BULK_REPOS_QUERY = """
+query($login: String!, $ownAfter: String, $contribAfter: String, $withOwn: Boolean!, $withContrib: Boolean!, $withPinned: Boolean!) {
+  user(login: $login) {
+    pinnedItems(first: 6, types: REPOSITORY) @include(if: $withPinned) {
+      nodes { ... on Repository { name } }
+    }
+    repositories(first: %(page)d, after: $ownAfter, ownerAffiliations: OWNER, privacy: PUBLIC,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) @include(if: $withOwn) {
+      pageInfo { hasNextPage endCursor }
+      nodes { ...RepoFields }
+    }
+    repositoriesContributedTo(first: %(page)d, after: $contribAfter, includeUserRepositories: false,
+                              contributionTypes: [PULL_REQUEST], privacy: PUBLIC) @include(if: $withContrib) {
+      pageInfo { hasNextPage endCursor }
+      nodes { ...RepoFields }
+    }
+  }
+}
+
+fragment RepoFields on Repository {
+%(fields)s}
+""" % {'page': GRAPHQL_PAGE_SIZE, 'fields': REPO_FIELDS}
+
+def graphql_query(query, variables=None):
+    """Run a GitHub GraphQL query and return its data, raising on HTTP or GraphQL errors"""
+    headers = {"Authorization": f"bearer {GITHUB_TOKEN}"}
+    with get_tracer().span('github_graphql') as span:
+        response = get_scheduler().request('github_graphql', 'POST', GITHUB_GRAPHQL_URL,
+                                           json={'query': query, 'variables': variables or {}}, headers=headers, timeout=30)
+        span['status'] = response.status_code
+        span['bytes'] = len(response.content)
+    count_response('github_graphql', response)
+    if response.status_code != 200:
+        raise Exception(f"GitHub GraphQL error: {response.status_code} - {response.text}")
+    result = response.json()
+    if result.get('errors'):
+        raise Exception(f"GitHub GraphQL error: {result['errors'][0].get('message')}")
+    return result['data']
+
+def graphql_repo(node):
+    """Convert a GraphQL repository node to the REST field names used everywhere else"""
+    branch = node.get('defaultBranchRef') or {}
+    return {
+        'name': node['name'],
+        'full_name': node['nameWithOwner'],
+        'html_url': node['url'],
+        'description': node['description'],
+        'fork': node['isFork'],
+        'private': node['isPrivate'],
+        'stargazers_count': node['stargazerCount'],
+        'updated_at': node['updatedAt'],
+        'pushed_at': node['pushedAt'],
+        'owner': {'login': node['owner']['login']},
+        'language': (node.get('primaryLanguage') or {}).get('name'),
+        'default_branch': branch.get('name'),
+        'default_branch_sha': (branch.get('target') or {}).get('oid'),
+    }
+
+def graphql_readme(node):
+    """Text of the first README found by the bulk query, or None"""
+    for i in range(len(README_PATHS)):
+        blob = node.get(f'readme{i}')
+        if blob and blob.get('text') is not None:
+            return blob['text']
+    return None
+
+def fetch_repos_graphql(username, refresh=False):
+    """Fetch own repos, contributed repos, pinned names and READMEs in a few paginated GraphQL queries
+
+    Replaces one REST call per contributed repo and per README. READMEs and pinned
+    names are saved to the cache under the keys fetch_readme and fetch_pinned_repos use.
+    GraphQL responses have no validators, so refresh=True skips the cached result and
+    queries again. Returns (own repos, contributed repos, pinned names).
+    """
+    cache_key = f"graphql_repos_{username}"
+    cached = None if refresh else get_from_cache(cache_key)
+    if cached:
+        print(f"Using cached GraphQL repos for {username}")
+        return cached['own'], cached['contributed'], cached['pinned']
+
+    own, contributed, pinned = [], [], []
+    variables = {'login': username, 'ownAfter': None, 'contribAfter': None,
+                 'withOwn': True, 'withContrib': True, 'withPinned': True}
+    queries = 0
+    while variables['withOwn'] or variables['withContrib']:
+        user = graphql_query(BULK_REPOS_QUERY, variables)['user']
+        queries += 1
+
+        if variables['withPinned']:
+            pinned = [node['name'] for node in user['pinnedItems']['nodes'] if node]
+            variables['withPinned'] = False
+
+        for field, repos, cursor, flag in (('repositories', own, 'ownAfter', 'withOwn'),
+                                            ('repositoriesContributedTo', contributed, 'contribAfter', 'withContrib')):
+            if not variables[flag]:
+                continue
+            connection = user[field]
+            for node in connection['nodes']:
+                if not node:
+                    continue
+                repo = graphql_repo(node)
+                readme = graphql_readme(node)
+                if readme is not None:
+                    save_to_cache(f"readme_{repo['owner']['login']}_{repo['name']}", readme)
+                repos.append(repo)
+            variables[cursor] = connection['pageInfo']['endCursor']
+            variables[flag] = connection['pageInfo']['hasNextPage']
+
+        # Own repos come newest first, later pages can't make the top MAX_REPOS
+        if len(own) >= MAX_REPOS:
+            variables['withOwn'] = False
+
+    print(f"Fetched {len(own)} own and {len(contributed)} contributed repos in {queries} GraphQL queries")
+    save_to_cache(f"pinned_{username}", pinned)
+    save_to_cache(cache_key, {'own': own, 'contributed': contributed, 'pinned': pinned})
+    return own, contributed, pinned
+
+def completed_future(value):
+    """Wrap an already known value so it can be collected like a pool result"""
+    future = Future()
+    future.set_result(value)
+    return future
+
+def write_json_if_changed(path, data):
+    """Write JSON atomically unless the file already holds the same data; returns True if written"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if json.load(f) == data:
+                return False
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    write_json_atomic(path, data)
+    return True
+
+def project_slug(project):
+    """Stable key of a project's detail file: owner--repo from its GitHub URL, lowercase
+
+    Ids follow the list order and change whenever a repo is added or re-sorted, a
+    cached detail file must never end up describing another project. GitHub logins
+    can't contain '--', so the key is unambiguous.
+    """
+    path = urlsplit(project.get('githubUrl') or '').path.strip('/')
+    if path.count('/') == 1:
+        return path.replace('/', '--').lower()
+    return f"project-{project['id']}"
+
+def write_project_shards(projects):
+    """Write the compact project index and one detail file per project from the full project list
+
+    Ignored projects are left out. Featured projects keep their long description in the
+    index because the featured cards show it; the others only have it in their detail file,
+    {slug}.json (see project_slug), whose slug every index entry carries.
+    Detail files of projects that are gone are removed.
+    """
+    visible = [project for project in projects if not project.get('ignore')]
+    index = []
+    for project in visible:
+        entry = {field: project[field] for field in INDEX_FIELDS if project.get(field) is not None}
+        entry['slug'] = project_slug(project)
+        if project.get('featured'):
+            entry['longDescription'] = project.get('longDescription', '')
+        index.append(entry)
+    write_json_if_changed(PROJECTS_INDEX, index)
+
+    os.makedirs(PROJECT_DETAILS_DIR, exist_ok=True)
+    # Unchanged files are not rewritten, so their cache validators stay valid
+    written = 0
+    names = set()
+    for project in visible:
+        slug = project_slug(project)
+        name = f"{slug}.json"
+        names.add(name)
+        detail = {'slug': slug, 'longDescription': project.get('longDescription', '')}
+        written += write_json_if_changed(os.path.join(PROJECT_DETAILS_DIR, name), detail)
+    for name in os.listdir(PROJECT_DETAILS_DIR):
+        if name.endswith('.json') and name not in names:
+            os.remove(os.path.join(PROJECT_DETAILS_DIR, name))
+
+    print(f"Updated {PROJECTS_INDEX} ({len(index)} projects, {written} detail files changed)")
+
+def repo_state(repo):
+    """Inputs an enrichment depends on: last push, default-branch head and README hash"""
+    return {
+        'pushed_at': repo.get('pushed_at'),
+        'sha': default_branch_sha(repo),
+        'readme': readme_fingerprint(fetch_readme(repo['owner']['login'], repo['name'])),
+    }
+
+def repo_unchanged(repo):
+    """Check whether a repo's inputs match the state saved when it was last enriched
+
+    An unchanged pushed_at settles it without any request. Otherwise the push may
+    have gone to another branch, so the default-branch head is compared.
+    """
+    state = get_from_cache(f"state_{repo['full_name']}")
+    if not state:
+        return False
+    if state['pushed_at'] == repo.get('pushed_at'):
+        return True
+    sha = default_branch_sha(repo)
+    if sha is not None and sha == state['sha']:
+        save_to_cache(f"state_{repo['full_name']}", dict(state, pushed_at=repo.get('pushed_at')))
+        return True
+    return False
+
+def readme_after_push(repo):
+    """Whether the cached README was saved after the repo's last push
+
+    True for READMEs taken from the GraphQL query of this run, which has no
+    validators to revalidate with but already reflects the push.
+    """
+    entry = get_cache().get_entry(f"readme_{repo['owner']['login']}_{repo['name']}")
+    if entry is None or not repo.get('pushed_at'):
+        return False
+    pushed_at = datetime.strptime(repo['pushed_at'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    return entry['timestamp'] > pushed_at.timestamp() + PUSH_CLOCK_MARGIN
+
+@traced('prepare_repo')
+def prepare_repo(repo, incremental=False):
+    """GitHub side of one repo: the incremental change check, then the README
+
+    Returns False when the repo is unchanged and its existing project can be kept.
+    """
+    if incremental:
+        if repo_unchanged(repo):
+            return False
+        # The repo moved on, don't trust a README cached before the push
+        fetch_readme(repo['owner']['login'], repo['name'], revalidate=not readme_after_push(repo))
+    else:
+        fetch_readme(repo['owner']['login'], repo['name'])
+    return True
+
+@traced('save_repo_state')
+def save_repo_state(repo):
+    save_to_cache(f"state_{repo['full_name']}", repo_state(repo))
+
+def structured_metadata(prepared, repo, tag_index, rejected):
+    """Run generate_metadata once prepare_repo has fetched the README, in the LLM pool
+
+    Returns None for an unchanged repo, or once the provider rejected the structured
+    request (the rejected event, set on the first 4xx other than 429).
+    """
+    if not prepared.result() or rejected.is_set():
+        return None
+    try:
+        return generate_metadata(repo, tag_index)
+    except OpenRouterError as e:
+        # A rejected response_format would fail the same way for every repo
+        if 400 <= e.status_code < 500 and e.status_code != 429:
+            rejected.set()
+        raise
+
+def update_projects_json(repos, pinned_repos=[], skip_existing=False, structured=True, incremental=False):
+    """Update the projects.json file with new projects
+
+    With structured=True each repo costs one OpenRouter call (generate_metadata), falling
+    back to the three per-field calls when the reply doesn't validate. The structured
+    calls run concurrently in the LLM pool; their tags are canonicalized in repo order.
+    With incremental=True, existing projects whose repo hasn't changed since its last
+    enrichment (see repo_unchanged) are kept as they are.
+    """
     existing_projects_map = {}
+    existing_data = []
 
     # Load existing projects if skipping logic is enabled or just to preserve order/tags
     try:
-        if os.path.exists('src/projects.json'):
-            with open('src/projects.json', 'r', encoding='utf-8') as f:
+        if os.path.exists(PROJECTS_PATH):
+            with open(PROJECTS_PATH, 'r', encoding='utf-8') as f:
                 existing_data = json.load(f)
                 for p in existing_data:
                     if 'githubUrl' in p:
@@ -373,111 +971,156 @@ def update_projects_json(repos, pinned_repos=[], skip_existing=False):
         print(f"Error reading existing projects: {e}")
     
     # Initialize with existing tags
-    all_tags = set(get_existing_tags())
-    print(f"Loaded {len(all_tags)} existing tags.")
-
-    for i, repo in enumerate(repos[:MAX_REPOS]):  # Top MAX_REPOS repos
-        print(f"Processing {i+1}/{MAX_REPOS}: {repo['name']}...")
-        
-        # Check if project exists
-        existing_project = existing_projects_map.get(repo['html_url'])
-
-        # Check for ignore flag in existing project
-        if existing_project and existing_project.get('ignore') is True:
-            print(f"Preserving ignored project: {repo['name']}")
-            # Keep the existing data exactly as is, just update ID if needed to maintain order
-            existing_project['id'] = i + 1
-            projects.append(existing_project)
-            # Add its tags to the pool to prevent them from looking like "new" tags if used elsewhere
-            if 'techStack' in existing_project:
-                all_tags.update(existing_project['techStack'])
-            continue
+    tag_index = build_tag_index(existing_data)
+    print(f"Loaded {len(tag_index.counts)} existing tags.")
 
-        # Check if project exists and we should skip reprocessing
-        if skip_existing and existing_project:
-            print(f"Skipping update for existing project: {repo['name']}")
-            project = existing_project
-            # Optional: Ensure ID is updated to match current sort order if desired, 
-            # or keep original ID. Here we align ID with current list position.
-            project['id'] = i + 1
-            # Still update featured status based on current pins
-            project['featured'] = repo['name'] in pinned_repos
-            projects.append(project)
-            continue
+    selected = repos[:MAX_REPOS]  # Top MAX_REPOS repos
+    results = [None] * len(selected)
 
-        print(f"Generating data for {repo['name']}...")
-        try:
-            fetch_readme(repo['owner']['login'], repo['name'])
-            
-            # Generate tags with awareness of existing tags
-            tags = generate_tags(repo, list(all_tags))
-            # Update our running list of tags
-            all_tags.update(tags)
-
-            project = {
-                'id': i + 1,
-                'title': repo['name'].replace('-', ' ').title(),
-                'description': generate_description(repo),
-                'longDescription': generate_long_description(repo),
-                'techStack': tags,
-                'image': f"/projects/{repo['name'].lower().replace('-', '')}.jpg",
-                'githubUrl': repo['html_url'],
-                'featured': repo['name'] in pinned_repos,
-                'category': get_category(repo['language'])
-            }
-        except FileNotFoundError:
-            # No README found, skip this repo
-            print(f"Skipping {repo['name']} due to missing README.")
-            continue
-        except Exception as e:
-            print(f"Skipping {repo['name']} due to: {e}.")
-            continue
+    with ThreadPoolExecutor(max_workers=GITHUB_WORKERS) as github_pool, \
+            ThreadPoolExecutor(max_workers=LLM_WORKERS) as llm_pool:
+        # Check for changes and prefetch the READMEs of every repo that may need generation
+        prepared = {}
+        for i, repo in enumerate(selected):
+            existing_project = existing_projects_map.get(repo['html_url'])
+            if existing_project and (existing_project.get('ignore') is True or skip_existing):
+                continue
+            prepared[i] = github_pool.submit(prepare_repo, repo, incremental and existing_project is not None)
 
-        projects.append(project)
+        # Structured calls are sent right away instead of one repo at a time. Their prompts
+        # offer the tags known before the run (a copy, the loop below keeps adding to the
+        # index), so they don't depend on which call finishes first.
+        metadata_futures = {}
+        rejected = threading.Event()
+        if structured:
+            known_tags = copy.deepcopy(tag_index)
+            for i, future in prepared.items():
+                metadata_futures[i] = llm_pool.submit(structured_metadata, future, selected[i], known_tags, rejected)
 
-    # Write to projects.json
-    with open('src/projects.json', 'w', encoding='utf-8') as f:
-        json.dump(projects, f, indent=2)
+        pending = []
+        for i, repo in enumerate(selected):
+            print(f"Processing {i+1}/{MAX_REPOS}: {repo['name']}...")
 
-    print("Updated projects.json")
+            # Check if project exists
+            existing_project = existing_projects_map.get(repo['html_url'])
 
-def main():
-    init_db()
-    
-    skip_existing = "--skip-existing" in sys.argv
-    if skip_existing:
-        print("Mode: Skipping existing projects in projects.json")
+            # Check for ignore flag in existing project
+            if existing_project and existing_project.get('ignore') is True:
+                print(f"Preserving ignored project: {repo['name']}")
+                # Keep the existing data exactly as is, just update ID if needed to maintain order
+                existing_project['id'] = i + 1
+                results[i] = existing_project
+                continue
 
-    username = "WiredMind2"
-    print(f"Fetching repositories for {username}...")
+            # Check if project exists and we should skip reprocessing
+            if skip_existing and existing_project:
+                print(f"Skipping update for existing project: {repo['name']}")
+                project = existing_project
+                # Optional: Ensure ID is updated to match current sort order if desired,
+                # or keep original ID. Here we align ID with current list position.
+                project['id'] = i + 1
+                # Still update featured status based on current pins
+                project['featured'] = repo['name'] in pinned_repos
+                results[i] = project
+                continue
 
-    own_repos = fetch_github_repos(username) or []
-    contributed_repos = fetch_contributed_repos(username) or []
-    
-    all_repos = own_repos + contributed_repos
+            try:
+                if not prepared[i].result():
+                    print(f"Unchanged since last run: {repo['name']}")
+                    project = existing_project
+                    project['id'] = i + 1
+                    project['featured'] = repo['name'] in pinned_repos
+                    results[i] = project
+                    continue
 
-    if not all_repos:
-        print("No repositories found")
-        return
+                print(f"Generating data for {repo['name']}...")
 
-    print(f"Found {len(own_repos)} own repos and {len(contributed_repos)} contributed repos")
+                # Per-field tags are generated one repo at a time, in order, since each
+                # call may pick tags of the repos before it
+                metadata = None
+                if i in metadata_futures:
+                    try:
+                        metadata = metadata_futures[i].result()
+                    except Exception as e:
+                        print(f"Structured generation failed for {repo['name']}, using per-field calls: {e}")
+                    if rejected.is_set() and structured:
+                        print("The provider rejected the structured request, using per-field calls for the rest of the run")
+                        structured = False
+                tags = metadata['tags'] if metadata else generate_tags(repo, tag_index)
+                # Known spellings only (JS -> JavaScript), then offer the tags to the next repos
+                tags = tag_index.canonicalize(tags)
+                tag_index.add(tags)
+            except FileNotFoundError:
+                # No README found, skip this repo
+                print(f"Skipping {repo['name']} due to missing README.")
+                continue
+            except Exception as e:
+                print(f"Skipping {repo['name']} due to: {e}.")
+                continue
 
-    # Combine and deduplicate
-    all_repos = own_repos + contributed_repos
-    
+            if metadata:
+                description = completed_future(metadata['description'])
+                long_description = completed_future(metadata['long_description'])
+            else:
+                # Descriptions don't depend on other repos and run in the background
+                description = llm_pool.submit(generate_description, repo)
+                long_description = llm_pool.submit(generate_long_description, repo)
+            state = github_pool.submit(save_repo_state, repo)
+            pending.append((i, repo, tags, description, long_description, state))
+
+        for i, repo, tags, description, long_description, state in pending:
+            try:
+                results[i] = {
+                    'id': i + 1,
+                    'title': repo['name'].replace('-', ' ').title(),
+                    'description': description.result(),
+                    'longDescription': long_description.result(),
+                    'techStack': tags,
+                    'image': f"/projects/{repo['name'].lower().replace('-', '')}.jpg",
+                    'githubUrl': repo['html_url'],
+                    'featured': repo['name'] in pinned_repos,
+                    'category': get_category(repo['language'])
+                }
+            except Exception as e:
+                print(f"Skipping {repo['name']} due to: {e}.")
+                continue
+            try:
+                state.result()
+            except Exception as e:
+                print(f"Could not save the state of {repo['name']}: {e}")
+
+    projects = [project for project in results if project is not None]
+
+    check_cassette()
+    # Write to projects.json
+    write_json_atomic(PROJECTS_PATH, projects)
+
+    print("Updated projects.json")
+
+    write_project_shards(projects)
+
+def select_repos(repos, username, limit=MAX_REPOS):
+    """Deduplicate a stream of repos sorted newest first, keeping the first limit public ones
+
+    Stops consuming the stream as soon as a repo would be the (limit+1)-th distinct
+    name, so older duplicates of already selected names past that point are not seen.
+    """
     # Group by repository name (case-insensitive) to handle forks/duplicates
     repos_by_name = {}
-    for r in all_repos:
-        # Check if we already processed this specific repo ID (absolute duplicate)
-        # But we handle this via the grouping now
-        
+    for r in repos:
+        # Filter public repos
+        if r.get('private', False):
+            continue
+
         name_key = r['name'].lower()
         if name_key not in repos_by_name:
+            if len(repos_by_name) == limit:
+                break
             repos_by_name[name_key] = []
         repos_by_name[name_key].append(r)
 
     unique_repos = []
-    
+
     for name_key, duplicates in repos_by_name.items():
         if len(duplicates) == 1:
             unique_repos.append(duplicates[0])
@@ -487,7 +1130,7 @@ def main():
             # 1. Prefer non-forks (original repos)
             # 2. If fork status same, prefer higher star count
             # 3. If tied, prefer the one owned by 'username'
-            
+
             def sort_key(r):
                 is_source = not r.get('fork', False)
                 stars = r.get('stargazers_count', 0)
@@ -496,24 +1139,235 @@ def main():
 
             # Sort descending
             duplicates.sort(key=sort_key, reverse=True)
-            
+
             # Pick the winner
             winner = duplicates[0]
             print(f"Duplicate content for '{winner['name']}': Selected {winner['full_name']} over {[d['full_name'] for d in duplicates[1:]]}")
             unique_repos.append(winner)
 
-    # Filter public repos
-    public_repos = [r for r in unique_repos if not r.get('private', False)]
-    
     # Sort by updated_at descending to mix them naturally
-    public_repos.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
-    
+    unique_repos.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
+    return unique_repos
+
+def collect_repos(username, refresh=False):
+    """Fetch own and contributed repos and return the deduplicated public ones, newest first
+
+    refresh=True asks GitHub even for listings cached less than a day ago (REST pages
+    are revalidated, the GraphQL query is sent again), so --incremental sees the
+    latest pushes.
+    """
+    print(f"Fetching repositories for {username}...")
+
+    own_repos = contributed_repos = None
+    if GITHUB_TOKEN:
+        try:
+            own_repos, contributed_repos, _ = fetch_repos_graphql(username, refresh)
+        except Exception as e:
+            print(f"GraphQL bulk fetch failed, falling back to REST: {e}")
+    if own_repos is None:
+        # Own repos stay a lazy stream; later pages are only requested if needed
+        own_repos = fetch_github_repos(username, refresh)
+        contributed_repos = list(fetch_contributed_repos(username, refresh))
+
+    print(f"Found {len(contributed_repos)} contributed repos")
+
+    # Contributed repos arrive in PR order and are few, sort them to merge with the own repos stream
+    contributed_repos.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
+    all_repos = heapq.merge(own_repos, contributed_repos, key=lambda x: x.get('updated_at', ''), reverse=True)
+
+    public_repos = select_repos(all_repos, username)
     print(f"Using {len(public_repos)} total public repositories")
+    return public_repos
+
+def poll_events(username, etag=None, interval=DEFAULT_POLL_INTERVAL):
+    """Make one conditional request to the user's public events feed
+
+    Returns (events, etag, poll interval); events is empty on a 304 or an error.
+    The previous interval is kept when the response has no X-Poll-Interval.
+    """
+    url = f"https://api.github.com/users/{username}/events"
+    headers = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
+    if etag:
+        headers['If-None-Match'] = etag
+    response = get_scheduler().request('github', 'GET', url, priority=HIGH if etag else NORMAL,
+                                       params={'per_page': 100}, headers=headers, timeout=30)
+    try:
+        interval = int(response.headers.get('X-Poll-Interval', interval))
+    except ValueError:
+        pass
+    if response.status_code == 200:
+        return response.json(), response.headers.get('ETag'), interval
+    if response.status_code != 304:
+        print(f"Error polling events: {response.status_code}")
+    return [], etag, interval
+
+def refresh_repo(full_name):
+    """Fetch the current metadata of one repo, or None if it is gone, private or archived
+
+    Any other failure (5xx, rate limit, network error) raises, so a GitHub outage
+    never drops a project; the daemon retries on its next iteration.
+    """
+    owner, name = full_name.split('/', 1)
+    repo, response = github_get(f"https://api.github.com/repos/{full_name}", f"repo_{owner}_{name}", revalidate=True)
+    if repo is None:
+        if response.status_code in (404, 410):
+            print(f"{full_name} is gone: {response.status_code}")
+            return None
+        raise Exception(f"GitHub error {response.status_code} refreshing {full_name}")
+    return None if repo.get('private', False) or repo.get('archived', False) else repo
+
+def run_daemon(username, skip_existing=False, structured=True):
+    """Keep projects.json in sync by polling the GitHub events feed
+
+    The repo map stays in memory between updates. Push, Create and PullRequest events
+    mark their repo dirty; once no new event arrived for DAEMON_DEBOUNCE seconds the
+    dirty repos are refreshed and projects.json is rebuilt incrementally, so only those
+    repos are re-enriched. Polls never come closer than X-Poll-Interval. A failed
+    iteration is logged and retried with an exponential backoff.
+    """
+    print(f"Starting sync daemon for {username}")
+    # The baseline is taken before the initial sync, so the first poll sees the events pushed during it
+    events, etag, interval = poll_events(username)
+    last_event_id = max((int(e['id']) for e in events), default=None)
+    repos = {repo['full_name']: repo for repo in collect_repos(username, refresh=True)}
+    update_projects_json(select_repos(sorted(repos.values(), key=lambda x: x.get('updated_at', ''), reverse=True), username),
+                         fetch_pinned_repos(username), skip_existing, structured, incremental=True)
+    get_cache().flush()
+
+    dirty = set()
+    last_event_time = 0
+    next_poll = 0
+    failures = 0
+    try:
+        while True:
+            try:
+                if time.time() >= next_poll:
+                    events, etag, interval = poll_events(username, etag, interval)
+                    next_poll = time.time() + interval
+                    new_events = [e for e in events if last_event_id is None or int(e['id']) > last_event_id]
+                    if events:
+                        newest = max(int(e['id']) for e in events)
+                        # Without a baseline (the feed was empty or failed) the first poll only sets it
+                        if last_event_id is not None:
+                            for event in new_events:
+                                if event['type'] in EVENT_TYPES:
+                                    dirty.add(event['repo']['name'])
+                                    last_event_time = time.time()
+                        last_event_id = max(newest, last_event_id or 0)
+
+                if dirty and time.time() - last_event_time >= DAEMON_DEBOUNCE:
+                    print(f"Syncing {len(dirty)} changed repos: {', '.join(sorted(dirty))}")
+                    for full_name in sorted(dirty):
+                        repo = refresh_repo(full_name)
+                        if repo is None:
+                            repos.pop(full_name, None)
+                        else:
+                            repos[full_name] = repo
+                    public_repos = select_repos(sorted(repos.values(), key=lambda x: x.get('updated_at', ''), reverse=True), username)
+                    update_projects_json(public_repos, fetch_pinned_repos(username), skip_existing, structured, incremental=True)
+                    get_cache().flush()
+                    # Cleared only once projects.json is written, a failed sync is retried
+                    dirty.clear()
+                failures = 0
+            except Exception as e:
+                # A network error or a failed update must not end the daemon, retry later
+                failures += 1
+                delay = min(DAEMON_MAX_BACKOFF, interval * 2 ** (failures - 1))
+                print(f"Sync daemon error ({type(e).__name__}: {e}), retrying in {delay}s")
+                next_poll = time.time() + delay
+                time.sleep(delay)
+                continue
+
+            # Polls stay X-Poll-Interval apart, the sleep only ends early for a pending sync
+            wake_at = next_poll
+            if dirty:
+                wake_at = min(wake_at, last_event_time + DAEMON_DEBOUNCE)
+            time.sleep(max(0, wake_at - time.time()))
+    except KeyboardInterrupt:
+        print("Sync daemon stopped")
+
+def write_run_report(report, trace):
+    """Write the run report and/or Chrome trace and print where the time went"""
+    tracer = get_tracer()
+    if report:
+        tracer.write(REPORT_PATH)
+        print(f"Wrote run report to {REPORT_PATH}")
+    if trace:
+        tracer.write(TRACE_PATH, chrome=True)
+        print(f"Wrote Chrome trace to {TRACE_PATH}")
+    summary = tracer.report()
+    for name in ('collect_repos', 'update_projects_json', 'fetch_readme', 'github', 'openrouter'):
+        if name in summary['phases']:
+            phase = summary['phases'][name]
+            print(f"  {name}: {phase['count']} spans, {phase['total_s']:.2f}s")
+    hits = sum(value for name, value in summary['counters'].items() if name.startswith('cache.') and name.endswith('.hit'))
+    misses = sum(value for name, value in summary['counters'].items() if name.startswith('cache.') and name.endswith('.miss'))
+    print(f"  cache: {hits} hits, {misses} misses")
+
+def run_update():
+    """One update of projects.json (or the daemon), as selected by the command line flags"""
+    init_db()
+    
+    skip_existing = "--skip-existing" in sys.argv
+    if skip_existing:
+        print("Mode: Skipping existing projects in projects.json")
+
+    structured = "--per-field" not in sys.argv
+    if not structured:
+        print("Mode: One OpenRouter call per field")
+
+    incremental = "--incremental" in sys.argv
+    if incremental:
+        print("Mode: Only re-enriching repos that changed since the last run")
+
+    username = "WiredMind2"
+
+    if "--split-only" in sys.argv:
+        # Regenerate the front-end files after editing projects.json by hand
+        with open(PROJECTS_PATH, 'r', encoding='utf-8') as f:
+            write_project_shards(json.load(f))
+        return
+
+    if "--daemon" in sys.argv:
+        run_daemon(username, skip_existing, structured)
+        return
+
+    with get_tracer().span('collect_repos'):
+        public_repos = collect_repos(username, refresh=incremental)
+    if not public_repos:
+        print("No repositories found")
+        return
 
     pinned_repos = fetch_pinned_repos(username)
-    update_projects_json(public_repos, pinned_repos, skip_existing)
+    with get_tracer().span('update_projects_json'):
+        update_projects_json(public_repos, pinned_repos, skip_existing, structured, incremental)
 
     print("Portfolio update complete!")
 
+def main():
+    report = "--report" in sys.argv
+    trace = "--trace" in sys.argv
+    if "--record" in sys.argv and "--replay" in sys.argv:
+        print("--record and --replay can't be used together")
+        sys.exit(1)
+    if "--record" in sys.argv or "--replay" in sys.argv:
+        mode = RECORD if "--record" in sys.argv else REPLAY
+        try:
+            start_cassette(mode)
+        except FileNotFoundError:
+            print(f"No cassette at {CASSETTE_PATH}, run with --record first")
+            sys.exit(1)
+        print(f"Mode: {'Recording requests to' if mode == RECORD else 'Replaying requests from'} {CASSETTE_PATH}")
+    try:
+        run_update()
+    except CassetteMiss as e:
+        print(f"Replay stopped before writing anything: {e}")
+        sys.exit(1)
+    finally:
+        if _cassette is not None:
+            finish_cassette()
+        if report or trace:
+            write_run_report(report, trace)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,9 +1,11 @@
 'use client';
 
-import React from 'react';
-import { getRandomAstronautImage } from '../utils/imageUtils';
+import React, { useState } from 'react';
+import { getAstronautSrcSet, getRandomAstronautImage } from '../utils/imageUtils';
 
 export default function Hero() {
+  const [profileImage] = useState(getRandomAstronautImage);
+
   return (
     <section id="hero" className="hero-section">
       <div className="hero-container">
@@ -50,7 +52,9 @@ export default function Hero() {
             <div className="hero-image-wrapper">
               <div className="hero-image-bg"></div>
               <img
-                src={getRandomAstronautImage()}
+                src={profileImage}
+                srcSet={getAstronautSrcSet(profileImage)}
+                sizes="(max-width: 768px) 60vw, 400px"
                 alt="Profile"
                 className="profile-img"
                 data-retry="0"
@@ -59,7 +63,9 @@ export default function Hero() {
                   const retry = parseInt(target.dataset.retry || '0');
                   if (retry < 5) {
                     target.dataset.retry = (retry + 1).toString();
-                    target.src = getRandomAstronautImage();
+                    const next = getRandomAstronautImage();
+                    target.srcset = getAstronautSrcSet(next) ?? '';
+                    target.src = next;
                   } else {
                     target.style.display = 'none';
                   }
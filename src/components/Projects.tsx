@@ -2,26 +2,27 @@
 
 import React, { useState, useEffect, useRef } from 'react';
 import gsap from 'gsap';
-import projectsData from '../projects.json';
-import { getRandomAstronautImage } from '../utils/imageUtils';
+import projectsIndex from '../projects.index.json';
+import { getAstronautSrcSet, getRandomAstronautImage } from '../utils/imageUtils';
 
 interface Project {
   id: number;
+  // Stable across updates, names the detail file (ids follow the list order)
+  slug: string;
   title: string;
   description: string;
-  longDescription: string;
+  // Only in the index for featured projects, the others load it from /project_details/{slug}.json
+  longDescription?: string;
   techStack: string[];
   image: string;
   liveUrl?: string;
   githubUrl?: string;
   featured: boolean;
   category: 'web' | 'mobile' | 'fullstack' | 'other';
-  ignore?: boolean;
 }
 
-// Add images to projects data and filter out ignored projects
-const projects: Project[] = (projectsData as Omit<Project, 'image'>[])
-  .filter(project => !project.ignore)
+// Add images to projects data (ignored projects are already left out of the index)
+const projects: Project[] = (projectsIndex as Omit<Project, 'image'>[])
   .map((project) => ({
     ...project,
     image: getRandomAstronautImage()
@@ -30,6 +31,7 @@ const projects: Project[] = (projectsData as Omit<Project, 'image'>[])
 export default function Projects() {
   const [filter, setFilter] = useState<string>('all');
   const [selectedProject, setSelectedProject] = useState<Project | null>(null);
+  const [longDescriptions, setLongDescriptions] = useState<Record<string, string>>({});
   const [visibleCount, setVisibleCount] = useState<number>(6);
   const filtersRef = useRef<HTMLDivElement>(null);
 
@@ -48,6 +50,27 @@ export default function Projects() {
     setVisibleCount(6);
   }, [filter]);
 
+  // Fetch the long description of the opened project the first time its modal is shown
+  useEffect(() => {
+    if (!selectedProject || selectedProject.longDescription !== undefined || selectedProject.slug in longDescriptions) {
+      return;
+    }
+    let cancelled = false;
+    fetch(`/project_details/${selectedProject.slug}.json`)
+      .then((response) => (response.ok ? response.json() : null))
+      .then((detail: { longDescription?: string } | null) => {
+        if (!cancelled && detail?.longDescription) {
+          setLongDescriptions((prev) => ({ ...prev, [selectedProject.slug]: detail.longDescription as string }));
+        }
+      })
+      .catch(() => {
+        // The short description stays in place
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [selectedProject, longDescriptions]);
+
   useEffect(() => {
     // Simple animation without ScrollTrigger to ensure it always runs
     gsap.fromTo('.project-card', 
@@ -97,6 +120,8 @@ export default function Projects() {
               <div className="featured-project-image">
                 <img
                   src={project.image}
+                  srcSet={getAstronautSrcSet(project.image)}
+                  sizes="(max-width: 768px) 100vw, 50vw"
                   alt={project.title}
                   className="project-img"
                   data-retry="0"
@@ -105,8 +130,11 @@ export default function Projects() {
                     const retry = parseInt(target.dataset.retry || '0');
                     if (retry < 5) {
                       target.dataset.retry = (retry + 1).toString();
-                      target.src = getRandomAstronautImage();
+                      const next = getRandomAstronautImage();
+                      target.srcset = getAstronautSrcSet(next) ?? '';
+                      target.src = next;
                     } else {
+                      target.removeAttribute('srcset');
                       target.src = `data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='600' height='400'%3E%3Crect width='600' height='400' fill='%23374151'/%3E%3Ctext x='50%25' y='50%25' dominant-baseline='middle' text-anchor='middle' fill='%239CA3AF' font-family='system-ui' font-size='24'%3E${project.title}%3C/text%3E%3C/svg%3E`;
                     }
                   }}
@@ -173,6 +201,8 @@ export default function Projects() {
                   <div className="project-card-image">
                     <img
                       src={project.image}
+                      srcSet={getAstronautSrcSet(project.image)}
+                      sizes="(max-width: 768px) 100vw, 33vw"
                       alt={project.title}
                       className="project-card-img"
                       data-retry="0"
@@ -181,8 +211,11 @@ export default function Projects() {
                         const retry = parseInt(target.dataset.retry || '0');
                         if (retry < 5) {
                           target.dataset.retry = (retry + 1).toString();
-                          target.src = getRandomAstronautImage();
+                          const next = getRandomAstronautImage();
+                          target.srcset = getAstronautSrcSet(next) ?? '';
+                          target.src = next;
                         } else {
+                          target.removeAttribute('srcset');
                           target.src = `data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='400' height='250'%3E%3Crect width='400' height='250' fill='%23374151'/%3E%3Ctext x='50%25' y='50%25' dominant-baseline='middle' text-anchor='middle' fill='%239CA3AF' font-family='system-ui' font-size='16'%3E${project.title}%3C/text%3E%3C/svg%3E`;
                         }
                       }}
@@ -240,6 +273,8 @@ export default function Projects() {
             <div className="project-modal-image">
               <img
                 src={selectedProject.image}
+                srcSet={getAstronautSrcSet(selectedProject.image)}
+                sizes="(max-width: 768px) 100vw, 800px"
                 alt={selectedProject.title}
                 className="modal-img"
                 data-retry="0"
@@ -248,8 +283,11 @@ export default function Projects() {
                   const retry = parseInt(target.dataset.retry || '0');
                   if (retry < 5) {
                     target.dataset.retry = (retry + 1).toString();
-                    target.src = getRandomAstronautImage();
+                    const next = getRandomAstronautImage();
+                    target.srcset = getAstronautSrcSet(next) ?? '';
+                    target.src = next;
                   } else {
+                    target.removeAttribute('srcset');
                     target.src = `data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='800' height='500'%3E%3Crect width='800' height='500' fill='%23374151'/%3E%3Ctext x='50%25' y='50%25' dominant-baseline='middle' text-anchor='middle' fill='%239CA3AF' font-family='system-ui' font-size='24'%3E${selectedProject.title}%3C/text%3E%3C/svg%3E`;
                   }
                 }}
@@ -257,7 +295,7 @@ export default function Projects() {
             </div>
             <div className="project-modal-body">
               <h3>{selectedProject.title}</h3>
-              <p>{selectedProject.longDescription}</p>
+              <p>{selectedProject.longDescription ?? longDescriptions[selectedProject.slug] ?? selectedProject.description}</p>
               <div className="project-modal-tech">
                 <strong>Tech Stack:</strong>
                 <div className="tech-tags">
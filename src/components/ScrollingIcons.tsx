@@ -1,5 +1,9 @@
 import React from "react";
 import techIcons from "../techIcons.json";
+import techIconSprite from "../techIconSprite.json";
+
+// Symbol ids in the sprite built by scripts/build_icon_sprite.py
+const spriteIds: Record<string, string> = techIconSprite.icons;
 
 export default function ScrollingIcons() {
   // Get all icon entries
@@ -13,12 +17,18 @@ export default function ScrollingIcons() {
   // Helper function to render icon elements
   const renderIcon = ([filename, data]: [string, { name: string; category: string }], index: number) => (
     <div key={`${filename}-${index}`} className="tech-icon">
-      <img 
-        src={`/tech_icons/${filename}`}
-        width={40}
-        height={40}
-        alt={data.name}
-      />
+      {spriteIds[filename] ? (
+        <svg className="tech-icon-sprite" width={40} height={40} role="img" aria-label={data.name}>
+          <use href={`${techIconSprite.url}#${spriteIds[filename]}`} />
+        </svg>
+      ) : (
+        <img
+          src={`/tech_icons/${filename}`}
+          width={40}
+          height={40}
+          alt={data.name}
+        />
+      )}
       <span>{data.name}</span>
     </div>
   );
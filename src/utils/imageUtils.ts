@@ -1,6 +1,42 @@
-export const astronautImageCount = 1000;
+import astronautAssets from '../astronauts.json';
+
+interface AstronautImage {
+  id: number;
+  // Variant widths, then the width of the full-size image
+  widths: number[];
+  avif?: boolean;
+}
+
+// Generated by scripts/process_images.py from the files that actually exist
+const astronautImages: AstronautImage[] = astronautAssets.images;
+
+const astronautImagesById = new Map(astronautImages.map((image) => [image.id, image]));
+
+export const astronautImageCount = astronautImages.length;
+
+// Shown when the manifest lists no image, e.g. before process_images.py ran
+const fallbackImage = '/favicon.webp';
+
+const imageUrl = (id: number, width?: number) =>
+  `${astronautAssets.path}/image_${id}${width ? `-${width}w` : ''}.webp`;
 
 export const getRandomAstronautImage = () => {
-  const randomIndex = Math.floor(Math.random() * astronautImageCount) + 1;
-  return `/astronauts/image_${randomIndex}.webp`;
-};
\ No newline at end of file
+  if (astronautImageCount === 0) {
+    return fallbackImage;
+  }
+  const image = astronautImages[Math.floor(Math.random() * astronautImageCount)];
+  return imageUrl(image.id);
+};
+
+// srcset with every width of the image behind a URL from getRandomAstronautImage
+export const getAstronautSrcSet = (src: string) => {
+  const match = src.match(/image_(\d+)\.webp$/);
+  const image = match && astronautImagesById.get(Number(match[1]));
+  if (!image) {
+    return undefined;
+  }
+  const fullWidth = image.widths.length - 1;
+  return image.widths
+    .map((width, i) => `${imageUrl(image.id, i === fullWidth ? undefined : width)} ${width}w`)
+    .join(', ');
+};